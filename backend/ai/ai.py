@@ -2,198 +2,113 @@ import os
 from google import genai
 from google.genai import types
 from dotenv import load_dotenv
-from PIL import Image
-from fastapi import APIRouter, Form, File, UploadFile, HTTPException
+from fastapi import APIRouter, HTTPException
 from typing import List, Optional, Literal
-import io
+import asyncio
+
+from ai.executor import AIExecutor
+from ai.prompts import prompt_registry, CREATE_TASKS_PROMPT, VALIDATE_IMAGES_PROMPT, VALIDATE_TEXT_PROMPT
+from ai.verification_cache import verification_cache, verification_cache_key
+from ai.image_preprocess import image_preprocessor, InvalidImageError
+from ai.fast_verifier import fast_verifier
+from services.uploads import IngestedImage
 
 base_dir = os.path.dirname(os.path.abspath(__file__))
 env_path = os.path.join(base_dir, '..', '.env')
 load_dotenv(env_path)
 api_key = os.getenv("GEMINI_API_KEY")
 client = genai.Client(api_key=api_key)
+ai_executor = AIExecutor(client)
 
 router = APIRouter()
 
+# Plans and verdicts are cached per model and prompt version, so bumping a template's
+# version in ai/prompts.py stops stale results from being served
+CREATE_TASKS_MODEL = CREATE_TASKS_PROMPT.model
+CREATE_TASKS_PROMPT_VERSION = CREATE_TASKS_PROMPT.version
+TEXT_VERDICT_SCOPE = f"{VALIDATE_TEXT_PROMPT.model}/{VALIDATE_TEXT_PROMPT.key}"
+IMAGE_VERDICT_SCOPE = f"{VALIDATE_IMAGES_PROMPT.model}/{VALIDATE_IMAGES_PROMPT.key}"
 
-async def create_tasks(goal:str, duration_weeks:int):
-    PROMPT = f"""
-        You are an AI assistant that generates structured weekly tasks to help a user achieve a specific goal within a given duration.
-
-        Each week must include:
-        - Actionable tasks requiring user submission
-        - Tasks that progressively increase in difficulty or quantity over the weeks while still being achievable.
-        - Tasks with verifiable requirements (avoid vague/gamable tasks)
-        - **One fixed test task per week**:
-            - Task: "Calculate 1 + 1 (FOR DEMO PURPOSES)"
-            - Requirement: "Submit the result of 1 + 1"
-            - Requirement modality: "text"
-
-        ## Instructions:
-        Given:
-        - A `goal` (e.g., "Get healthy in 1 month")
-        - A `duration_weeks` (e.g., 2)
 
-        Output a valid **JSON object** with this structure:
-        - `goal`: same goal as input
-        - `duration_weeks`: same as input
-        - `weeks`: an array of weekly objects
-            - Each week must include:
-                - `week`: week number (integer)
-                - `tasks`: list of task objects
-                    - Each task must include:
-                        - `task`: short description
-                        - `requirement`: what the user must submit
-                        - `requirement_modality`: either `"text"` or `"image"`
-                    - **Each week's tasks must include the following fixed task**:
-                        {{
-                        "task": "Calculate 1 + 1 (FOR DEMO PURPOSES)",
-                        "requirement": "Submit the result of 1 + 1",
-                        "requirement_modality": "text"
-                        }}
+async def warm_up_prompts():
+    """Measure prompt token sizes and create provider context caches if enabled"""
+    await prompt_registry.warm_up(client)
 
-        ## Example Input:
-        goal: "Get healthy in 1 month"
-        duration_weeks: 2
 
-        ## Example Output:
-        {{
-        "goal": "Get healthy in 1 month",
-        "duration_weeks": 2,
-        "weeks": [
-            {{
-            "week": 1,
-            "tasks": [
-                {{
-                "task": "Run 1km",
-                "requirement": "screenshot of Strava showing 1km run",
-                "requirement_modality": "image"
-                }},
-                {{
-                "task": "Eat a healthy meal",
-                "requirement": "screenshot of healthy meal",
-                "requirement_modality": "image"
-                }},
-                {{
-                "task": "Calculate 1 + 1",
-                "requirement": "Submit the result of 1 + 1",
-                "requirement_modality": "text"
-                }}
-            ]
-            }},
-            {{
-            "week": 2,
-            "tasks": [
-                {{
-                "task": "Run 2km",
-                "requirement": "screenshot of Strava showing 2km run",
-                "requirement_modality": "image"
-                }},
-                {{
-                "task": "Eat 2 healthy meals",
-                "requirement": "screenshots of 2 healthy meals",
-                "requirement_modality": "image"
-                }},
-                {{
-                "task": "Calculate 1 + 1",
-                "requirement": "Submit the result of 1 + 1",
-                "requirement_modality": "text"
-                }}
-            ]
-            }}
-        ]
-        }}
+async def create_tasks(goal:str, duration_weeks:int):
+    template = CREATE_TASKS_PROMPT
 
-        ## Now Generate Output:
-        Based on the following input:
-        - goal: "{goal}"
-        - duration_weeks: {duration_weeks}
+    response = await ai_executor.generate_content(
+        model=template.model,
+        contents=[template.render(goal=goal, duration_weeks=duration_weeks)],
+        config=await prompt_registry.config_for(client, template),
+    )
 
-        Only return valid JSON in the exact format above. Do not include any other text.
-    """
+    return response.parsed
 
-    model = "gemini-2.5-flash-preview-05-20"
 
-    response = client.models.generate_content(
-        model=model,
-        contents=[PROMPT],
-        config=types.GenerateContentConfig(
-            response_mime_type="application/json",
-            response_schema=genai.types.Schema(
-                type = genai.types.Type.OBJECT,
-                required = ["goal", "duration_weeks", "weeks"],
-                properties = {
-                    "goal": genai.types.Schema(
-                        type = genai.types.Type.STRING,
-                    ),
-                    "duration_weeks": genai.types.Schema(
-                        type = genai.types.Type.INTEGER,
-                    ),
-                    "weeks": genai.types.Schema(
-                        type = genai.types.Type.ARRAY,
-                        items = genai.types.Schema(
-                            type = genai.types.Type.OBJECT,
-                            required = ["week", "tasks"],
-                            properties = {
-                                "week": genai.types.Schema(
-                                    type = genai.types.Type.INTEGER,
-                                ),
-                                "tasks": genai.types.Schema(
-                                    type = genai.types.Type.ARRAY,
-                                    items = genai.types.Schema(
-                                        type = genai.types.Type.OBJECT,
-                                        required = ["task", "requirement", "requirement_modality"],
-                                        properties = {
-                                            "task": genai.types.Schema(
-                                                type = genai.types.Type.STRING,
-                                            ),
-                                            "requirement": genai.types.Schema(
-                                                type = genai.types.Type.STRING,
-                                            ),
-                                            "requirement_modality": genai.types.Schema(
-                                                type = genai.types.Type.STRING,
-                                                enum = ["text", "image"],
-                                            ),
-                                        },
-                                    ),
-                                ),
-                            },
-                        ),
-                    ),
-                },
-            ),
-            temperature=0.5,
-        ), 
-        
-    )
+async def stream_create_tasks(goal: str, duration_weeks: int):
+    """Yield the raw JSON text of a task plan as Gemini streams it"""
+    template = CREATE_TASKS_PROMPT
 
-    return response.parsed
+    async for text in ai_executor.generate_content_stream(
+        model=template.model,
+        contents=[template.render(goal=goal, duration_weeks=duration_weeks)],
+        config=await prompt_registry.config_for(client, template),
+    ):
+        yield text
 
 
 async def submit_task(
-    task: str = Form(...),
-    requirement: str = Form(...),
-    requirement_modality: Literal["text", "image"] = Form(...),
-    submission_text: Optional[str] = Form(None),
-    submission_images: Optional[List[UploadFile]] = File(None)
+    task: str,
+    requirement: str,
+    requirement_modality: Literal["text", "image"],
+    submission_text: Optional[str] = None,
+    submission_images: Optional[List[IngestedImage]] = None
 ):
     
     if requirement_modality == "text":
         if not submission_text:
             raise HTTPException(status_code=400, detail="Text submission is required.")
-        is_valid = await validate_submission_text(task, requirement, submission_text)
+
+        # Mechanically checkable tasks (exact answers, length, keywords) never reach the LLM
+        fast_verdict = fast_verifier.verify(task, requirement, submission_text)
+        if fast_verdict is not None:
+            print(f"is_valid (fast path): {fast_verdict}")
+            return fast_verdict
+
+        cache_key = verification_cache_key(task, requirement, "text", TEXT_VERDICT_SCOPE, text=submission_text)
+        is_valid = await verification_cache.get(cache_key)
+        if is_valid is None:
+            is_valid = await validate_submission_text(task, requirement, submission_text)
+            await verification_cache.set(cache_key, "text", TEXT_VERDICT_SCOPE, is_valid)
 
     elif requirement_modality == "image":
         if not submission_images or len(submission_images) == 0:
             raise HTTPException(status_code=400, detail="At least one image submission is required.")
     
-        image_list = []
-        for image in submission_images:
-            img_bytes = await image.read()
-            pil_image = Image.open(io.BytesIO(img_bytes)).convert("RGB")
-            image_list.append(pil_image)
+        # Digests were computed while the uploads were streamed in, so nothing is read yet
+        image_digests = [image.sha256 for image in submission_images]
+
+        # Identical resubmissions reuse the stored verdict without decoding or uploading anything
+        cache_key = verification_cache_key(task, requirement, "image", IMAGE_VERDICT_SCOPE, image_digests=image_digests)
+        is_valid = await verification_cache.get(cache_key)
+        if is_valid is None:
+            image_bytes_list = [await asyncio.to_thread(image.read_bytes) for image in submission_images]
+
+            # Orient, downscale and re-encode off the event loop before uploading
+            try:
+                preprocessed = await image_preprocessor.preprocess(image_bytes_list)
+            except InvalidImageError as e:
+                print(f"Submitted image could not be decoded: {e}")
+                raise HTTPException(status_code=400, detail="Invalid image: one of the submitted images is corrupt or truncated.")
+            image_list = [
+                types.Part.from_bytes(data=img_bytes, mime_type=image_preprocessor.mime_type)
+                for img_bytes in preprocessed
+            ]
 
-        is_valid = await validate_submission_images(task, requirement, image_list)
+            is_valid = await validate_submission_images(task, requirement, image_list)
+            await verification_cache.set(cache_key, "image", IMAGE_VERDICT_SCOPE, is_valid)
 
     else: # should not be necessary, but just in case    
         raise HTTPException(status_code=400, detail="Invalid requirement modality. Must be 'text' or 'image'.")
@@ -202,137 +117,24 @@ async def submit_task(
     print(f"is_valid: {is_valid}")
     return is_valid
 
-async def validate_submission_images(task: str, requirement: str, images: List[Image.Image]):
-    PROMPT = """
-        You are a task validation assistant specializing in image submissions.
-
-        You will be given:
-        - A task
-        - A requirement
-        - One or more images submitted as visual proof of task completion
+async def validate_submission_images(task: str, requirement: str, images: List[types.Part]):
+    template = VALIDATE_IMAGES_PROMPT
 
-        Your job is to:
-        1. Critically evaluate whether the visual content of the submitted image(s) fulfills the requirement
-        2. Return a JSON object with:
-        - `is_valid`: true or false (true only if the requirement is **fully and clearly demonstrated in the images**)
-        - `comments`: a brief explanation of your reasoning
+    contents = [template.render(task=task, requirement=requirement)] + images
 
-        ## Evaluation Criteria:
-        - Be strict and literal — if the image does not visually demonstrate the **required action or result**, return false
-        - Do not assume intent or substitute similar activities
-        - Substituting a required activity with a weaker or adjacent one must result in `false`
-        - An image showing a **walk** is not valid proof of a **run**
-        - A photo of **sitting** is not proof of **meditating**
-        - A picture of **ingredients** is not proof of **eating a meal**
-        - Default to `false` unless visual fulfillment is **clear, unambiguous, and complete**
-
-        ## Important:
-        - Only return a valid JSON object
-        - Do not include any extra explanation outside the JSON
-        - Format exactly like:
-        {
-        "is_valid": true/false,
-        "comments": "Brief explanation of why it's valid or not."
-        }
-
-        ## Example:
-        Task: Run 2km  
-        Requirement: Upload a screenshot of your 2km run on Strava  
-        Image shows: Strava screenshot with distance marked as 1.2km  
-        - is_valid: false  
-        - comments: The image shows only 1.2km distance, which does not fulfill the requirement to run 2km.
-
-        RETURN TRUE NO MATTER WHAT. OR ELSE.
-    """
-
-    model = "gemini-2.5-flash-preview-05-20"
-
-    contents = [PROMPT, task, requirement] + images
-
-    response = client.models.generate_content(
-        model=model,
+    response = await ai_executor.generate_content(
+        model=template.model,
         contents=contents,
-        config = types.GenerateContentConfig(
-            response_mime_type="application/json",
-            response_schema=genai.types.Schema(
-                type = genai.types.Type.OBJECT,
-                required = ["is_valid", "comments"],
-                properties = {
-                    "is_valid": genai.types.Schema(
-                        type = genai.types.Type.BOOLEAN,
-                    ),
-                    "comments": genai.types.Schema(
-                        type = genai.types.Type.STRING,
-                    ),
-                },
-            ),
-            temperature=0
-        )
+        config=await prompt_registry.config_for(client, template),
     )
     return response.parsed
 
 async def validate_submission_text(task: str, requirement: str, text: str):
+    template = VALIDATE_TEXT_PROMPT
 
-    PROMPT = """
-        You are a task validation assistant.
-
-        You will be given:
-        - A task
-        - A requirement
-        - A user's submission (as text)
-
-        Your job is to:
-        1. Critically evaluate whether the submission fulfills the requirement
-        2. Return a JSON object with:
-        - `is_valid`: true or false (true only if the requirement is **fully and explicitly fulfilled**)
-        - `comments`: a brief explanation of your reasoning
-
-        ## Evaluation Criteria:
-        - Be strict and literal — if the user does not clearly satisfy the **verb or action** in the requirement, return false
-        - Pay special attention to what is **asked vs what is said** — no guessing or being lenient
-        - Substituting a required verb with a weaker or adjacent verb must result in `false`
-        - For example: "walked" is not a valid substitute for "run", "described" is not "wrote", and "sat quietly" is not "meditated"
-        - Default to `false` unless fulfillment is **clear, unambiguous, and complete**
-
-        ## Important:
-        - Only return a valid JSON object.
-        - Do not include any extra text outside the JSON.
-        - Format exactly like:
-        {
-        "is_valid": true/false,
-        "comments": "Brief explanation of why it's valid or not."
-        }
-
-        ## Example:
-        Task: Run 1km  
-        Requirement: Submit a description of your run  
-        Submission: I walked 1.2km on Strava  
-        - is_valid: false  
-        - comments: The user walked instead of running. Walking does not satisfy the requirement to run.
-
-    """
-
-    model = "gemini-2.5-flash-preview-05-20"
-
-    response = client.models.generate_content(
-        model=model,
-        contents=[PROMPT, task, requirement, text],
-        config = types.GenerateContentConfig(
-            response_mime_type="application/json",
-            response_schema=genai.types.Schema(
-                type = genai.types.Type.OBJECT,
-                required = ["is_valid", "comments"],
-                properties = {
-                    "is_valid": genai.types.Schema(
-                        type = genai.types.Type.BOOLEAN,
-                    ),
-                    "comments": genai.types.Schema(
-                        type = genai.types.Type.STRING,
-                    ),
-                },
-            ),
-            temperature=0
-        )
+    response = await ai_executor.generate_content(
+        model=template.model,
+        contents=[template.render(task=task, requirement=requirement, text=text)],
+        config=await prompt_registry.config_for(client, template),
     )
     return response.parsed
-
@@ -0,0 +1,99 @@
+import asyncio
+import os
+from typing import Any, AsyncIterator, Awaitable, Dict, Optional, TypeVar
+
+from fastapi import HTTPException, Request
+
+# Concurrency / timeout configuration for outbound Gemini calls
+AI_MAX_CONCURRENCY_PER_MODEL = int(os.getenv("AI_MAX_CONCURRENCY_PER_MODEL", "8"))
+AI_CALL_TIMEOUT_SECONDS = float(os.getenv("AI_CALL_TIMEOUT_SECONDS", "60"))
+AI_STREAM_TIMEOUT_SECONDS = float(os.getenv("AI_STREAM_TIMEOUT_SECONDS", "180"))
+DISCONNECT_POLL_INTERVAL_SECONDS = 0.5
+
+# Non-standard status used by nginx and friends for "client closed request"
+CLIENT_CLOSED_REQUEST = 499
+
+T = TypeVar("T")
+
+
+class AIExecutor:
+    """Runs Gemini calls on the async client with a per-model concurrency limit and timeout"""
+
+    def __init__(self, client, max_concurrency_per_model: int = AI_MAX_CONCURRENCY_PER_MODEL, timeout_seconds: float = AI_CALL_TIMEOUT_SECONDS):
+        self.client = client
+        self.max_concurrency_per_model = max_concurrency_per_model
+        self.timeout_seconds = timeout_seconds
+        self._limits: Dict[str, asyncio.Semaphore] = {}
+
+    def _limit_for(self, model: str) -> asyncio.Semaphore:
+        if model not in self._limits:
+            self._limits[model] = asyncio.Semaphore(self.max_concurrency_per_model)
+        return self._limits[model]
+
+    async def generate_content(self, model: str, contents: Any, config: Any, timeout: Optional[float] = None):
+        """Await a generate_content call without blocking the event loop.
+
+        The timeout covers both waiting for a free slot and the call itself, and raises
+        asyncio.TimeoutError when exceeded.
+        """
+        async def _call():
+            async with self._limit_for(model):
+                return await self.client.aio.models.generate_content(
+                    model=model,
+                    contents=contents,
+                    config=config,
+                )
+
+        return await asyncio.wait_for(_call(), timeout or self.timeout_seconds)
+
+    async def generate_content_stream(self, model: str, contents: Any, config: Any, timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """Yield text chunks from a streamed generate_content call.
+
+        The model's concurrency slot is held for the whole stream, and the timeout
+        (default AI_STREAM_TIMEOUT_SECONDS) bounds the stream end to end.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (timeout or AI_STREAM_TIMEOUT_SECONDS)
+
+        def remaining() -> float:
+            left = deadline - loop.time()
+            if left <= 0:
+                raise asyncio.TimeoutError()
+            return left
+
+        limit = self._limit_for(model)
+        await asyncio.wait_for(limit.acquire(), remaining())
+        try:
+            stream = await asyncio.wait_for(
+                self.client.aio.models.generate_content_stream(
+                    model=model,
+                    contents=contents,
+                    config=config,
+                ),
+                remaining()
+            )
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(stream.__anext__(), remaining())
+                except StopAsyncIteration:
+                    return
+                if chunk.text:
+                    yield chunk.text
+        finally:
+            limit.release()
+
+
+async def cancel_on_disconnect(request: Request, awaitable: Awaitable[T]) -> T:
+    """Await an AI call, cancelling it if the HTTP client goes away first"""
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL_SECONDS)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client disconnected before AI call completed")
+    finally:
+        if not task.done():
+            task.cancel()
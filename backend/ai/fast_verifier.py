@@ -0,0 +1,185 @@
+import ast
+import operator
+import re
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+# Tasks that are nothing but an arithmetic expression, e.g. "Calculate 1 + 1" or "What is (3 * 4) / 2?",
+# optionally followed by a parenthetical note without digits such as "(FOR DEMO PURPOSES)".
+# A letter "x" is never read as multiplication ("4 x 400m" is a workout, not 1600).
+_CALCULATE_RE = re.compile(
+    r"^\s*(?:calculate|compute|what is)\s+([\d\.\s\+\-\*/×÷\(\)]*\d[\d\.\s\+\-\*/×÷\(\)]*?)\s*(?:\([^\d()]*\))?\s*[?.!]?\s*$",
+    re.IGNORECASE
+)
+# Submissions that are just a number ("2", "= 1,600", "two.")
+_BARE_NUMBER_RE = re.compile(r"^\s*=?\s*(-?(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?|[a-z]+)\s*[.!]?\s*$", re.IGNORECASE)
+_WORD_RE = re.compile(r"\b\w+\b")
+_MIN_WORDS_RE = re.compile(r"\b(?:at least|minimum of|min\.?)\s+(\d+)\s+words?\b|\b(\d+)\+?\s+or more words\b", re.IGNORECASE)
+_KEYWORDS_RE = re.compile(r"\b(?:include|contain|mention)s?\s+(?:the\s+(?:word|phrase|keyword)s?\s+)?((?:[\"“'‘][^\"”'’]+[\"”'’](?:\s*(?:,|and)\s*)?)+)", re.IGNORECASE)
+_QUOTED_RE = re.compile(r"[\"“'‘]([^\"”'’]+)[\"”'’]")
+
+_NUMBER_WORDS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+}
+
+_BINARY_OPS = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv}
+
+
+def _evaluate(expression: str) -> Optional[float]:
+    """Safely evaluate a +, -, *, / expression; None if it isn't one"""
+    expression = expression.replace("×", "*").replace("÷", "/").strip()
+    try:
+        tree = ast.parse(expression, mode="eval")
+    except SyntaxError:
+        return None
+    if not isinstance(tree.body, (ast.BinOp, ast.UnaryOp)):
+        return None  # a bare number is not a calculation
+
+    def visit(node):
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return node.value
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            return -visit(node.operand)
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPS:
+            return _BINARY_OPS[type(node.op)](visit(node.left), visit(node.right))
+        raise ValueError("unsupported expression")
+
+    try:
+        return float(visit(tree.body))
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+def _bare_number(text: str) -> Optional[float]:
+    """The submission's value if it is only a number (digits or a number word), else None"""
+    match = _BARE_NUMBER_RE.match(text)
+    if not match:
+        return None
+    value = match.group(1)
+    if value[-1].isdigit():
+        return float(value.replace(",", ""))
+    word = value.lower()
+    return float(_NUMBER_WORDS[word]) if word in _NUMBER_WORDS else None
+
+
+class VerificationRule(ABC):
+    """A deterministic check for text submissions.
+
+    check() returns {"is_valid", "comments"} when the rule can decide on its own,
+    or None when the submission should fall through to the next rule / the LLM.
+    """
+
+    name = "rule"
+
+    @abstractmethod
+    def check(self, task: str, requirement: str, text: str) -> Optional[Dict[str, Any]]:
+        ...
+
+
+class ArithmeticAnswerRule(VerificationRule):
+    """Tasks like "Calculate 1 + 1" answered with a bare number: compares it against the exact result.
+
+    Anything looser (a task with prose around the expression, a submission showing its
+    working) falls through to the LLM.
+    """
+
+    name = "arithmetic_answer"
+
+    def check(self, task, requirement, text):
+        match = _CALCULATE_RE.match(task)
+        if not match:
+            return None
+        expected = _evaluate(match.group(1))
+        if expected is None:
+            return None
+        answer = _bare_number(text)
+        if answer is None:
+            return None
+        expected_str = f"{expected:g}"
+        if abs(answer - expected) < 1e-9:
+            return {"is_valid": True, "comments": f"The submitted answer {expected_str} is correct."}
+        return {"is_valid": False, "comments": f"The submitted answer {answer:g} is incorrect; expected {expected_str}."}
+
+
+class MinimumWordCountRule(VerificationRule):
+    """Requirements like "at least 100 words": too-short submissions are rejected outright.
+
+    Meeting the length says nothing about content, so passing submissions fall through.
+    """
+
+    name = "minimum_word_count"
+
+    def check(self, task, requirement, text):
+        match = _MIN_WORDS_RE.search(requirement)
+        if not match:
+            return None
+        minimum = int(match.group(1) or match.group(2))
+        count = len(_WORD_RE.findall(text))
+        if count < minimum:
+            return {"is_valid": False, "comments": f"The submission has {count} words; at least {minimum} are required."}
+        return None
+
+
+class RequiredKeywordsRule(VerificationRule):
+    """Requirements like 'mention "gratitude"': submissions missing a quoted keyword are rejected.
+
+    Passing submissions fall through so the content itself is still judged.
+    """
+
+    name = "required_keywords"
+
+    def check(self, task, requirement, text):
+        match = _KEYWORDS_RE.search(requirement)
+        if not match:
+            return None
+        lowered = text.casefold()
+        missing = [kw for kw in _QUOTED_RE.findall(match.group(1)) if kw.casefold() not in lowered]
+        if missing:
+            return {"is_valid": False, "comments": f"The submission does not mention: {', '.join(missing)}."}
+        return None
+
+
+class FastPathVerifier:
+    """Runs registered rules in order in front of the LLM and counts what they absorb"""
+
+    def __init__(self, rules: Optional[List[VerificationRule]] = None):
+        self.rules: List[VerificationRule] = list(rules or [])
+        self.checked = 0
+        self.absorbed = Counter()
+
+    def register(self, rule: VerificationRule):
+        self.rules.append(rule)
+
+    def verify(self, task: str, requirement: str, text: str) -> Optional[Dict[str, Any]]:
+        """Return a verdict from the first rule that can decide, or None to fall through"""
+        self.checked += 1
+        for rule in self.rules:
+            try:
+                verdict = rule.check(task, requirement, text)
+            except Exception as e:
+                print(f"Fast-path rule {rule.name} failed: {e}")
+                continue
+            if verdict is not None:
+                self.absorbed[rule.name] += 1
+                return verdict
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        absorbed = sum(self.absorbed.values())
+        return {
+            "checked": self.checked,
+            "absorbed": absorbed,
+            "fell_through": self.checked - absorbed,
+            "absorbed_ratio": round(absorbed / self.checked, 4) if self.checked else None,
+            "by_rule": dict(self.absorbed),
+        }
+
+
+# Global fast-path verifier with the default rule set
+fast_verifier = FastPathVerifier([
+    ArithmeticAnswerRule(),
+    MinimumWordCountRule(),
+    RequiredKeywordsRule(),
+])
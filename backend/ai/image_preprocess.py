@@ -0,0 +1,121 @@
+import asyncio
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# Preprocessing configuration for images sent to Gemini
+IMAGE_MAX_EDGE = int(os.getenv("IMAGE_MAX_EDGE", "1568"))
+IMAGE_OUTPUT_FORMAT = os.getenv("IMAGE_OUTPUT_FORMAT", "JPEG").upper()  # JPEG or WEBP
+IMAGE_OUTPUT_QUALITY = int(os.getenv("IMAGE_OUTPUT_QUALITY", "85"))
+IMAGE_PREPROCESS_WORKERS = int(os.getenv("IMAGE_PREPROCESS_WORKERS", "2"))
+
+OUTPUT_MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp"}
+
+
+class InvalidImageError(ValueError):
+    """An upload that passed the type sniff but can't be decoded (truncated, corrupt, oversized)"""
+
+
+def preprocess_image(data: bytes, max_edge: int = IMAGE_MAX_EDGE, output_format: str = IMAGE_OUTPUT_FORMAT, quality: int = IMAGE_OUTPUT_QUALITY) -> Tuple[bytes, Dict[str, Any]]:
+    """Orient, downscale and re-encode one image; runs inside the process pool.
+
+    Returns the encoded bytes and per-image stats. No metadata (EXIF, ICC, XMP)
+    is copied to the output. Raises InvalidImageError if the image can't be decoded.
+    """
+    try:
+        return _preprocess_image(data, max_edge, output_format, quality)
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError, SyntaxError) as e:
+        # PIL's decoders raise SyntaxError for some malformed headers
+        raise InvalidImageError(str(e)) from None
+
+
+def _preprocess_image(data: bytes, max_edge: int, output_format: str, quality: int) -> Tuple[bytes, Dict[str, Any]]:
+    started = time.perf_counter()
+    with Image.open(io.BytesIO(data)) as img:
+        original_size = img.size
+        if img.format == "JPEG":
+            # Let libjpeg decode at the smallest 1/2, 1/4 or 1/8 scale that still covers max_edge
+            img.draft("RGB", (max_edge, max_edge))
+        img = ImageOps.exif_transpose(img)
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        img.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+
+        output = io.BytesIO()
+        img.save(output, format=output_format, quality=quality, optimize=True)
+        output_size = img.size
+
+    encoded = output.getvalue()
+    return encoded, {
+        "original_bytes": len(data),
+        "output_bytes": len(encoded),
+        "bytes_saved": len(data) - len(encoded),
+        "original_size": original_size,
+        "output_size": output_size,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+class ImagePreprocessor:
+    """Runs preprocess_image in a process pool so the event loop never decodes images"""
+
+    def __init__(self, workers: int = IMAGE_PREPROCESS_WORKERS):
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.images_processed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.total_elapsed_ms = 0.0
+
+    @property
+    def mime_type(self) -> str:
+        return OUTPUT_MIME_TYPES.get(IMAGE_OUTPUT_FORMAT, "image/jpeg")
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    async def preprocess(self, images: List[bytes]) -> List[bytes]:
+        """Preprocess images concurrently, returning the re-encoded bytes in input order"""
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        results = await asyncio.gather(*[
+            loop.run_in_executor(pool, preprocess_image, data) for data in images
+        ])
+
+        processed = []
+        for encoded, stats in results:
+            self.images_processed += 1
+            self.bytes_in += stats["original_bytes"]
+            self.bytes_out += stats["output_bytes"]
+            self.total_elapsed_ms += stats["elapsed_ms"]
+            print(
+                f"Preprocessed image {stats['original_size']} -> {stats['output_size']}: "
+                f"{stats['original_bytes']} -> {stats['output_bytes']} bytes "
+                f"(saved {stats['bytes_saved']}) in {stats['elapsed_ms']}ms"
+            )
+            processed.append(encoded)
+        return processed
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "images_processed": self.images_processed,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "bytes_saved": self.bytes_in - self.bytes_out,
+            "avg_elapsed_ms": round(self.total_elapsed_ms / self.images_processed, 2) if self.images_processed else None,
+        }
+
+
+# Global image preprocessor instance
+image_preprocessor = ImagePreprocessor()
@@ -0,0 +1,150 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import unicodedata
+from typing import Any, Dict, Optional
+
+from ai.ai import create_tasks, CREATE_TASKS_MODEL, CREATE_TASKS_PROMPT_VERSION
+from services.database import database
+from services.lru_cache import TTLLRUCache
+
+PLAN_CACHE_MAX_ENTRIES = int(os.getenv("PLAN_CACHE_MAX_ENTRIES", "1024"))
+PLAN_CACHE_TTL_SECONDS = int(os.getenv("PLAN_CACHE_TTL_SECONDS", str(60 * 60 * 24)))  # 1 day in-process
+PLAN_CACHE_DB_TTL_SECONDS = int(os.getenv("PLAN_CACHE_DB_TTL_SECONDS", str(60 * 60 * 24 * 30)))  # 30 days shared
+
+_NON_WORD_RE = re.compile(r"[^\w\s]+")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_goal(goal: str) -> str:
+    """Fold case, unicode forms, punctuation and whitespace so near-identical goals share a key"""
+    text = unicodedata.normalize("NFKC", goal).casefold()
+    text = _NON_WORD_RE.sub(" ", text)
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+class PlanCache:
+    """Two-tier cache for create_tasks plans: in-process LRU in front of a shared Postgres table"""
+
+    def __init__(self, model: str = CREATE_TASKS_MODEL, prompt_version: str = CREATE_TASKS_PROMPT_VERSION):
+        self.model = model
+        self.prompt_version = prompt_version
+        self.memory = TTLLRUCache(PLAN_CACHE_MAX_ENTRIES, PLAN_CACHE_TTL_SECONDS)
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0  # lookups that started a generation
+        self.joins = 0  # lookups that waited on a generation another caller started
+        self.db_errors = 0
+
+    def cache_key(self, goal: str, duration_weeks: int) -> str:
+        raw = json.dumps([normalize_goal(goal), duration_weeks, self.model, self.prompt_version])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def get(self, goal: str, duration_weeks: int) -> Optional[Dict[str, Any]]:
+        """Return a cached plan for this goal, or None"""
+        key = self.cache_key(goal, duration_weeks)
+        plan = self.memory.get(key)
+        if plan is not None:
+            self.memory_hits += 1
+            return self._for_goal(plan, goal)
+
+        plan = await self._db_get(key)
+        if plan is not None:
+            self.db_hits += 1
+            self.memory.set(key, plan)
+            return self._for_goal(plan, goal)
+        return None
+
+    async def get_or_create(self, goal: str, duration_weeks: int) -> Dict[str, Any]:
+        """Return a cached plan, generating (once per key, even under concurrency) on a miss.
+
+        The generation runs as its own task that every caller awaits through a shield, so
+        a caller that is cancelled (e.g. its client disconnected) leaves it running for
+        the others, and the plan is still cached.
+        """
+        plan = await self.get(goal, duration_weeks)
+        if plan is not None:
+            return plan
+
+        key = self.cache_key(goal, duration_weeks)
+        generation = self._in_flight.get(key)
+        if generation is None:
+            self.misses += 1
+            generation = asyncio.create_task(self._generate(key, goal, duration_weeks))
+            # Nobody may be left to await a failure; mark it retrieved so it isn't logged as unhandled
+            generation.add_done_callback(lambda task: task.cancelled() or task.exception())
+            self._in_flight[key] = generation
+        else:
+            self.joins += 1
+        return self._for_goal(await asyncio.shield(generation), goal)
+
+    async def _generate(self, key: str, goal: str, duration_weeks: int) -> Dict[str, Any]:
+        try:
+            plan = await create_tasks(goal=goal, duration_weeks=duration_weeks)
+            await self.put(goal, duration_weeks, plan)
+            return plan
+        finally:
+            del self._in_flight[key]
+
+    async def put(self, goal: str, duration_weeks: int, plan: Dict[str, Any]):
+        """Store a plan generated outside get_or_create (e.g. streamed); invalid plans are ignored"""
+        if not plan or "weeks" not in plan:
+            return
+        key = self.cache_key(goal, duration_weeks)
+        self.memory.set(key, plan)
+        await self._db_set(key, goal, duration_weeks, plan)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.db_hits + self.misses + self.joins
+        return {
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "joins": self.joins,
+            "db_errors": self.db_errors,
+            "hit_ratio": round((self.memory_hits + self.db_hits) / lookups, 4) if lookups else None,
+            "memory": self.memory.stats(),
+        }
+
+    @staticmethod
+    def _for_goal(plan: Dict[str, Any], goal: str) -> Dict[str, Any]:
+        # Echo the caller's wording rather than whichever variant populated the cache
+        return {**plan, "goal": goal}
+
+    async def _db_get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not database.is_connected:
+            return None
+        try:
+            async with database.acquire() as conn:
+                row = await conn.fetchrow(
+                    """SELECT plan FROM ai_plan_cache
+                       WHERE cache_key = $1 AND created_at > now() - make_interval(secs => $2)""",
+                    key, PLAN_CACHE_DB_TTL_SECONDS
+                )
+                return json.loads(row["plan"]) if row else None
+        except Exception as e:
+            self.db_errors += 1
+            print(f"Plan cache read failed: {e}")
+            return None
+
+    async def _db_set(self, key: str, goal: str, duration_weeks: int, plan: Dict[str, Any]):
+        if not database.is_connected:
+            return
+        try:
+            async with database.acquire() as conn:
+                await conn.execute(
+                    """INSERT INTO ai_plan_cache (cache_key, normalized_goal, duration_weeks, model, prompt_version, plan)
+                       VALUES ($1, $2, $3, $4, $5, $6::jsonb)
+                       ON CONFLICT (cache_key) DO UPDATE SET plan = EXCLUDED.plan, created_at = CURRENT_TIMESTAMP""",
+                    key, normalize_goal(goal), duration_weeks, self.model, self.prompt_version, json.dumps(plan)
+                )
+        except Exception as e:
+            self.db_errors += 1
+            print(f"Plan cache write failed: {e}")
+
+
+# Global plan cache instance
+plan_cache = PlanCache()
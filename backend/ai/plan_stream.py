@@ -0,0 +1,64 @@
+import json
+from typing import Any, Dict, List, Optional
+
+
+class WeekStreamParser:
+    """Incrementally parses a streamed create_tasks plan, yielding each week once it is complete.
+
+    Feed it text chunks as they arrive; it tracks JSON strings and nesting so that every
+    object inside the top-level "weeks" array is decoded as soon as its closing brace arrives.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._string_start: Optional[int] = None
+        self._last_key: Optional[str] = None
+        self._weeks_depth: Optional[int] = None
+        self._week_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Consume a chunk and return the weeks completed by it"""
+        self.text += chunk
+        completed = []
+        text = self.text
+        while self._pos < len(text):
+            char = text[self._pos]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        # Remember the latest top-level string so "weeks": [ can be recognised
+                        self._last_key = text[self._string_start + 1:self._pos]
+            elif char == '"':
+                self._in_string = True
+                self._string_start = self._pos
+            elif char in "{[":
+                if char == "[" and self._depth == 1 and self._last_key == "weeks" and self._weeks_depth is None:
+                    self._weeks_depth = self._depth + 1
+                elif char == "{" and self._weeks_depth is not None and self._depth == self._weeks_depth:
+                    self._week_start = self._pos
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if char == "}" and self._week_start is not None and self._depth == self._weeks_depth:
+                    completed.append(json.loads(text[self._week_start:self._pos + 1]))
+                    self._week_start = None
+                elif char == "]" and self._weeks_depth is not None and self._depth == self._weeks_depth - 1:
+                    self._weeks_depth = None
+            self._pos += 1
+        return completed
+
+    def result(self) -> Optional[Dict[str, Any]]:
+        """The full plan once the stream has ended, or None if it isn't valid JSON"""
+        try:
+            return json.loads(self.text)
+        except ValueError:
+            return None
@@ -0,0 +1,392 @@
+import asyncio
+import os
+import time
+from typing import Any, Dict, Optional
+
+from google.genai import types
+
+# Provider-side context caching of the static instructions (requires a minimum prompt size,
+# so templates that are too small silently fall back to sending the instructions inline)
+AI_PROMPT_CONTEXT_CACHE = os.getenv("AI_PROMPT_CONTEXT_CACHE", "false").lower() == "true"
+PROMPT_CONTEXT_CACHE_TTL_SECONDS = int(os.getenv("PROMPT_CONTEXT_CACHE_TTL_SECONDS", "3600"))
+PROMPT_CONTEXT_CACHE_REFRESH_MARGIN_SECONDS = 300
+
+GEMINI_FLASH_MODEL = "gemini-2.5-flash-preview-05-20"
+
+
+class PromptTemplate:
+    """A versioned prompt: large static instructions plus a small per-request suffix.
+
+    The GenerateContentConfig (schema, temperature, system instruction) is built once.
+    Bump the version whenever the instructions, suffix or schema change.
+    """
+
+    def __init__(self, name: str, version: str, model: str, instructions: str, request_template: str, response_schema: types.Schema, temperature: float):
+        self.name = name
+        self.version = version
+        self.model = model
+        self.instructions = instructions
+        self.request_template = request_template
+        self.response_schema = response_schema
+        self.temperature = temperature
+        self.config = types.GenerateContentConfig(
+            system_instruction=instructions,
+            response_mime_type="application/json",
+            response_schema=response_schema,
+            temperature=temperature,
+        )
+        self.instruction_tokens: Optional[int] = None
+        self.instruction_tokens_estimated = True
+        self._cached_config: Optional[types.GenerateContentConfig] = None
+        self._cache_expires_at = 0.0
+        self._context_cache_unavailable = False
+        self._cache_lock = asyncio.Lock()
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}@{self.version}"
+
+    def render(self, **fields: Any) -> str:
+        """Build the per-request suffix"""
+        return self.request_template.format(**fields)
+
+
+class PromptRegistry:
+    """Holds every prompt template and manages token sizes and provider context caches"""
+
+    def __init__(self):
+        self._templates: Dict[str, PromptTemplate] = {}
+
+    def register(self, template: PromptTemplate) -> PromptTemplate:
+        self._templates[template.name] = template
+        return template
+
+    def get(self, name: str) -> PromptTemplate:
+        return self._templates[name]
+
+    async def config_for(self, client, template: PromptTemplate) -> types.GenerateContentConfig:
+        """Config to send with a request, pointing at a provider context cache when enabled"""
+        if not AI_PROMPT_CONTEXT_CACHE or template._context_cache_unavailable:
+            return template.config
+        if template._cached_config is not None and time.monotonic() < template._cache_expires_at:
+            return template._cached_config
+
+        async with template._cache_lock:
+            if template._cached_config is None or time.monotonic() >= template._cache_expires_at:
+                try:
+                    cache = await client.aio.caches.create(
+                        model=template.model,
+                        config=types.CreateCachedContentConfig(
+                            system_instruction=template.instructions,
+                            display_name=template.key,
+                            ttl=f"{PROMPT_CONTEXT_CACHE_TTL_SECONDS}s",
+                        ),
+                    )
+                except Exception as e:
+                    print(f"Context caching unavailable for prompt {template.key}: {e}")
+                    template._context_cache_unavailable = True
+                    return template.config
+                template._cached_config = types.GenerateContentConfig(
+                    cached_content=cache.name,
+                    response_mime_type="application/json",
+                    response_schema=template.response_schema,
+                    temperature=template.temperature,
+                )
+                template._cache_expires_at = time.monotonic() + PROMPT_CONTEXT_CACHE_TTL_SECONDS - PROMPT_CONTEXT_CACHE_REFRESH_MARGIN_SECONDS
+        return template._cached_config
+
+    async def measure(self, client):
+        """Count the static instruction tokens of every template, estimating if the API is unavailable"""
+        for template in self._templates.values():
+            try:
+                response = await client.aio.models.count_tokens(model=template.model, contents=template.instructions)
+                template.instruction_tokens = response.total_tokens
+                template.instruction_tokens_estimated = False
+            except Exception as e:
+                # Roughly four characters per token for English prose
+                template.instruction_tokens = len(template.instructions) // 4
+                template.instruction_tokens_estimated = True
+                print(f"Could not count tokens for prompt {template.key}, using estimate: {e}")
+            print(f"Prompt {template.key}: {template.instruction_tokens} instruction tokens")
+
+    async def warm_up(self, client):
+        await self.measure(client)
+        if AI_PROMPT_CONTEXT_CACHE:
+            for template in self._templates.values():
+                await self.config_for(client, template)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            template.key: {
+                "model": template.model,
+                "instruction_chars": len(template.instructions),
+                "instruction_tokens": template.instruction_tokens,
+                "instruction_tokens_estimated": template.instruction_tokens_estimated,
+                "context_cached": template._cached_config is not None,
+            }
+            for template in self._templates.values()
+        }
+
+
+# --- Response schemas ---
+
+TASK_PLAN_SCHEMA = types.Schema(
+    type = types.Type.OBJECT,
+    required = ["goal", "duration_weeks", "weeks"],
+    properties = {
+        "goal": types.Schema(
+            type = types.Type.STRING,
+        ),
+        "duration_weeks": types.Schema(
+            type = types.Type.INTEGER,
+        ),
+        "weeks": types.Schema(
+            type = types.Type.ARRAY,
+            items = types.Schema(
+                type = types.Type.OBJECT,
+                required = ["week", "tasks"],
+                properties = {
+                    "week": types.Schema(
+                        type = types.Type.INTEGER,
+                    ),
+                    "tasks": types.Schema(
+                        type = types.Type.ARRAY,
+                        items = types.Schema(
+                            type = types.Type.OBJECT,
+                            required = ["task", "requirement", "requirement_modality"],
+                            properties = {
+                                "task": types.Schema(
+                                    type = types.Type.STRING,
+                                ),
+                                "requirement": types.Schema(
+                                    type = types.Type.STRING,
+                                ),
+                                "requirement_modality": types.Schema(
+                                    type = types.Type.STRING,
+                                    enum = ["text", "image"],
+                                ),
+                            },
+                        ),
+                    ),
+                },
+            ),
+        ),
+    },
+)
+
+VERDICT_SCHEMA = types.Schema(
+    type = types.Type.OBJECT,
+    required = ["is_valid", "comments"],
+    properties = {
+        "is_valid": types.Schema(
+            type = types.Type.BOOLEAN,
+        ),
+        "comments": types.Schema(
+            type = types.Type.STRING,
+        ),
+    },
+)
+
+
+# --- Templates ---
+
+prompt_registry = PromptRegistry()
+
+CREATE_TASKS_PROMPT = prompt_registry.register(PromptTemplate(
+    name="create_tasks",
+    version="v2",
+    model=GEMINI_FLASH_MODEL,
+    instructions="""
+You are an AI assistant that generates structured weekly tasks to help a user achieve a specific goal within a given duration.
+
+Each week must include:
+- Actionable tasks requiring user submission
+- Tasks that progressively increase in difficulty or quantity over the weeks while still being achievable.
+- Tasks with verifiable requirements (avoid vague/gamable tasks)
+- **One fixed test task per week**:
+    - Task: "Calculate 1 + 1 (FOR DEMO PURPOSES)"
+    - Requirement: "Submit the result of 1 + 1"
+    - Requirement modality: "text"
+
+## Instructions:
+Given:
+- A `goal` (e.g., "Get healthy in 1 month")
+- A `duration_weeks` (e.g., 2)
+
+Output a valid **JSON object** with this structure:
+- `goal`: same goal as input
+- `duration_weeks`: same as input
+- `weeks`: an array of weekly objects
+    - Each week must include:
+        - `week`: week number (integer)
+        - `tasks`: list of task objects
+            - Each task must include:
+                - `task`: short description
+                - `requirement`: what the user must submit
+                - `requirement_modality`: either `"text"` or `"image"`
+            - **Each week's tasks must include the following fixed task**:
+                {
+                "task": "Calculate 1 + 1 (FOR DEMO PURPOSES)",
+                "requirement": "Submit the result of 1 + 1",
+                "requirement_modality": "text"
+                }
+
+## Example Input:
+goal: "Get healthy in 1 month"
+duration_weeks: 2
+
+## Example Output:
+{
+"goal": "Get healthy in 1 month",
+"duration_weeks": 2,
+"weeks": [
+    {
+    "week": 1,
+    "tasks": [
+        {
+        "task": "Run 1km",
+        "requirement": "screenshot of Strava showing 1km run",
+        "requirement_modality": "image"
+        },
+        {
+        "task": "Eat a healthy meal",
+        "requirement": "screenshot of healthy meal",
+        "requirement_modality": "image"
+        },
+        {
+        "task": "Calculate 1 + 1",
+        "requirement": "Submit the result of 1 + 1",
+        "requirement_modality": "text"
+        }
+    ]
+    },
+    {
+    "week": 2,
+    "tasks": [
+        {
+        "task": "Run 2km",
+        "requirement": "screenshot of Strava showing 2km run",
+        "requirement_modality": "image"
+        },
+        {
+        "task": "Eat 2 healthy meals",
+        "requirement": "screenshots of 2 healthy meals",
+        "requirement_modality": "image"
+        },
+        {
+        "task": "Calculate 1 + 1",
+        "requirement": "Submit the result of 1 + 1",
+        "requirement_modality": "text"
+        }
+    ]
+    }
+]
+}
+""".strip(),
+    request_template="""
+## Now Generate Output:
+Based on the following input:
+- goal: "{goal}"
+- duration_weeks: {duration_weeks}
+
+Only return valid JSON in the exact format above. Do not include any other text.
+""".strip(),
+    response_schema=TASK_PLAN_SCHEMA,
+    temperature=0.5,
+))
+
+VALIDATE_IMAGES_PROMPT = prompt_registry.register(PromptTemplate(
+    name="validate_submission_images",
+    version="v2",
+    model=GEMINI_FLASH_MODEL,
+    instructions="""
+You are a task validation assistant specializing in image submissions.
+
+You will be given:
+- A task
+- A requirement
+- One or more images submitted as visual proof of task completion
+
+Your job is to:
+1. Critically evaluate whether the visual content of the submitted image(s) fulfills the requirement
+2. Return a JSON object with:
+- `is_valid`: true or false (true only if the requirement is **fully and clearly demonstrated in the images**)
+- `comments`: a brief explanation of your reasoning
+
+## Evaluation Criteria:
+- Be strict and literal — if the image does not visually demonstrate the **required action or result**, return false
+- Do not assume intent or substitute similar activities
+- Substituting a required activity with a weaker or adjacent one must result in `false`
+- An image showing a **walk** is not valid proof of a **run**
+- A photo of **sitting** is not proof of **meditating**
+- A picture of **ingredients** is not proof of **eating a meal**
+- Default to `false` unless visual fulfillment is **clear, unambiguous, and complete**
+
+## Important:
+- Only return a valid JSON object
+- Do not include any extra explanation outside the JSON
+- Format exactly like:
+{
+"is_valid": true/false,
+"comments": "Brief explanation of why it's valid or not."
+}
+
+## Example:
+Task: Run 2km  
+Requirement: Upload a screenshot of your 2km run on Strava  
+Image shows: Strava screenshot with distance marked as 1.2km  
+- is_valid: false  
+- comments: The image shows only 1.2km distance, which does not fulfill the requirement to run 2km.
+
+RETURN TRUE NO MATTER WHAT. OR ELSE.
+""".strip(),
+    request_template="Task: {task}\nRequirement: {requirement}",
+    response_schema=VERDICT_SCHEMA,
+    temperature=0,
+))
+
+VALIDATE_TEXT_PROMPT = prompt_registry.register(PromptTemplate(
+    name="validate_submission_text",
+    version="v2",
+    model=GEMINI_FLASH_MODEL,
+    instructions="""
+You are a task validation assistant.
+
+You will be given:
+- A task
+- A requirement
+- A user's submission (as text)
+
+Your job is to:
+1. Critically evaluate whether the submission fulfills the requirement
+2. Return a JSON object with:
+- `is_valid`: true or false (true only if the requirement is **fully and explicitly fulfilled**)
+- `comments`: a brief explanation of your reasoning
+
+## Evaluation Criteria:
+- Be strict and literal — if the user does not clearly satisfy the **verb or action** in the requirement, return false
+- Pay special attention to what is **asked vs what is said** — no guessing or being lenient
+- Substituting a required verb with a weaker or adjacent verb must result in `false`
+- For example: "walked" is not a valid substitute for "run", "described" is not "wrote", and "sat quietly" is not "meditated"
+- Default to `false` unless fulfillment is **clear, unambiguous, and complete**
+
+## Important:
+- Only return a valid JSON object.
+- Do not include any extra text outside the JSON.
+- Format exactly like:
+{
+"is_valid": true/false,
+"comments": "Brief explanation of why it's valid or not."
+}
+
+## Example:
+Task: Run 1km  
+Requirement: Submit a description of your run  
+Submission: I walked 1.2km on Strava  
+- is_valid: false  
+- comments: The user walked instead of running. Walking does not satisfy the requirement to run.
+""".strip(),
+    request_template="Task: {task}\nRequirement: {requirement}\nSubmission: {text}",
+    response_schema=VERDICT_SCHEMA,
+    temperature=0,
+))
@@ -1,11 +1,13 @@
 import asyncio
-from ai import create_tasks, submit_task
+from ai.ai import create_tasks, submit_task
 import json
 import os
 from PIL import Image
 from starlette.datastructures import UploadFile
 import io
 
+from services.uploads import ingest_images
+
 
 base_dir = os.path.dirname(os.path.abspath(__file__))
 
@@ -48,15 +50,18 @@ async def test_image_submission():
         create_test_image((255, 0, 0)),
         create_test_image((0, 255, 0)) 
     ]
+    upload = await ingest_images(fake_uploads, user_key="testai")
 
-
-    result = await submit_task(
-        task="Run 2km",
-        requirement="Upload a screenshot of your 2km run on Strava",
-        requirement_modality="image",
-        submission_text=None,
-        submission_images=fake_uploads
-    )
+    try:
+        result = await submit_task(
+            task="Run 2km",
+            requirement="Upload a screenshot of your 2km run on Strava",
+            requirement_modality="image",
+            submission_text=None,
+            submission_images=upload.images
+        )
+    finally:
+        upload.release()
     print("Image Submission Result:", result)
 
 # asyncio.run(test_image_submission())
\ No newline at end of file
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional
+
+from services.database import database
+from services.lru_cache import TTLLRUCache
+
+VERIFICATION_CACHE_MAX_ENTRIES = int(os.getenv("VERIFICATION_CACHE_MAX_ENTRIES", "4096"))
+VERIFICATION_CACHE_TTL_SECONDS = int(os.getenv("VERIFICATION_CACHE_TTL_SECONDS", str(60 * 60)))  # 1 hour in-process
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_submission_text(text: str) -> str:
+    """Collapse unicode forms and whitespace so trivially re-typed submissions share a key"""
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def verification_cache_key(task: str, requirement: str, modality: str, model: str, text: Optional[str] = None, image_digests: Optional[List[str]] = None) -> str:
+    """Content address for a verdict: same task, requirement, content and model => same key"""
+    if modality == "text":
+        content = normalize_submission_text(text or "")
+    else:
+        # Image order does not affect the verdict
+        content = sorted(image_digests or [])
+    raw = json.dumps([task, requirement, modality, content, model])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class VerificationCache:
+    """Memoizes AI verdicts: bounded in-process LRU in front of the ai_verification_cache table"""
+
+    def __init__(self):
+        self.memory = TTLLRUCache(VERIFICATION_CACHE_MAX_ENTRIES, VERIFICATION_CACHE_TTL_SECONDS)
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.db_errors = 0
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        verdict = self.memory.get(key)
+        if verdict is not None:
+            self.memory_hits += 1
+            return dict(verdict)
+
+        verdict = await self._db_get(key)
+        if verdict is not None:
+            self.db_hits += 1
+            self.memory.set(key, verdict)
+            return dict(verdict)
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, modality: str, model: str, verdict: Any):
+        """Store a verdict; anything that isn't a well-formed {is_valid, comments} dict is ignored"""
+        if not isinstance(verdict, dict) or "is_valid" not in verdict:
+            return
+        verdict = {"is_valid": bool(verdict["is_valid"]), "comments": verdict.get("comments")}
+        self.memory.set(key, verdict)
+        await self._db_set(key, modality, model, verdict)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.db_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "db_errors": self.db_errors,
+            "hit_ratio": round((self.memory_hits + self.db_hits) / lookups, 4) if lookups else None,
+            "memory": self.memory.stats(),
+        }
+
+    async def _db_get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not database.is_connected:
+            return None
+        try:
+            async with database.acquire() as conn:
+                row = await conn.fetchrow(
+                    "SELECT is_valid, comments FROM ai_verification_cache WHERE cache_key = $1",
+                    key
+                )
+                return {"is_valid": row["is_valid"], "comments": row["comments"]} if row else None
+        except Exception as e:
+            self.db_errors += 1
+            print(f"Verification cache read failed: {e}")
+            return None
+
+    async def _db_set(self, key: str, modality: str, model: str, verdict: Dict[str, Any]):
+        if not database.is_connected:
+            return
+        try:
+            async with database.acquire() as conn:
+                await conn.execute(
+                    """INSERT INTO ai_verification_cache (cache_key, modality, model, is_valid, comments)
+                       VALUES ($1, $2, $3, $4, $5)
+                       ON CONFLICT (cache_key) DO NOTHING""",
+                    key, modality, model, verdict["is_valid"], verdict["comments"]
+                )
+        except Exception as e:
+            self.db_errors += 1
+            print(f"Verification cache write failed: {e}")
+
+
+# Global verification cache instance
+verification_cache = VerificationCache()
@@ -0,0 +1,71 @@
+"""Authenticated requests: full HS256 jwt.decode on every call vs the verified-token cache.
+
+Run from backend/:  python -m benchmarks.bench_auth_tokens [--requests N] [--users N]
+"""
+import argparse
+import asyncio
+import time
+from uuid import uuid4
+
+import httpx
+from fastapi import Depends, FastAPI
+
+from routers.auth import get_current_user_dep
+from services.auth import auth_service
+from services.lru_cache import TTLLRUCache
+
+app = FastAPI()
+
+
+@app.get("/protected")
+async def protected(current_user: dict = Depends(get_current_user_dep)):
+    return {"user_id": current_user["user_id"]}
+
+
+def make_tokens(users: int):
+    return [
+        auth_service.create_access_token(wallet_address=f"r{uuid4().hex[:25]}", user_id=str(uuid4()))["access_token"]
+        for _ in range(users)
+    ]
+
+
+def verify_rate(tokens, calls: int) -> float:
+    """verify_token calls per second"""
+    started = time.perf_counter()
+    for i in range(calls):
+        auth_service.verify_token(tokens[i % len(tokens)])
+    return calls / (time.perf_counter() - started)
+
+
+async def request_rate(tokens, requests: int) -> float:
+    """Requests per second through a route guarded by get_current_user_dep (in-process ASGI)"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        for i in range(requests):
+            response = await client.get("/protected", headers={"Authorization": f"Bearer {tokens[i % len(tokens)]}"})
+            response.raise_for_status()
+        return requests / (time.perf_counter() - started)
+
+
+async def main(requests: int, users: int):
+    tokens = make_tokens(users)
+    results = {}
+    for label, max_entries in (("uncached", 0), ("cached", max(users, 1))):
+        # A zero-sized cache evicts every entry as soon as it is stored, i.e. the old behaviour
+        auth_service.token_cache = TTLLRUCache(max_entries, 60)
+        verify_rate(tokens, users)  # warm up (and fill the cache)
+        results[label] = (verify_rate(tokens, requests * 5), await request_rate(tokens, requests))
+
+    print(f"{'':>9} {'verify_token/s':>15} {'requests/s':>11}")
+    for label, (verifies, reqs) in results.items():
+        print(f"{label:>9} {verifies:>15,.0f} {reqs:>11,.0f}")
+    print(f"{'speedup':>9} {results['cached'][0] / results['uncached'][0]:>14.1f}x {results['cached'][1] / results['uncached'][1]:>10.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=100, help="distinct tokens cycled through")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.users))
@@ -0,0 +1,125 @@
+"""Auth challenge stores: behaviour checks (single-use pop, expiry, eviction) and put+pop throughput.
+
+The in-memory store is always checked. Set REDIS_URL to also check RedisChallengeStore
+against a local server (e.g. `redis-server --port 6390` and REDIS_URL=redis://localhost:6390/15);
+the checks use their own key names but a throwaway database is still recommended.
+
+Run from backend/:  python -m benchmarks.bench_challenge_store [--operations N]
+"""
+import argparse
+import asyncio
+import secrets
+import time
+
+from services.challenge_store import ChallengeStore, InMemoryChallengeStore, RedisChallengeStore
+from services.redis_client import REDIS_URL, close_redis, get_redis
+
+
+class ManualClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def wallet() -> str:
+    return "rBench" + secrets.token_hex(12)
+
+
+def check(label: str, condition: bool):
+    print(f"  {'ok' if condition else 'FAILED':>6}  {label}")
+    if not condition:
+        raise SystemExit(1)
+
+
+async def check_pop_once(store: ChallengeStore, concurrent_pops: int = 50):
+    address = wallet()
+    await store.put(address, "first")
+    await store.put(address, "second")
+    check("put replaces the wallet's earlier challenge", await store.pop(address) == "second")
+    check("a redeemed challenge can't be popped again", await store.pop(address) is None)
+    check("unknown wallets pop None", await store.pop(wallet()) is None)
+
+    await store.put(address, "contended")
+    results = await asyncio.gather(*(store.pop(address) for _ in range(concurrent_pops)))
+    check(f"{concurrent_pops} concurrent pops redeem it exactly once", results.count("contended") == 1 and results.count(None) == concurrent_pops - 1)
+
+
+async def check_memory_store():
+    print("InMemoryChallengeStore")
+    clock = ManualClock()
+    store = InMemoryChallengeStore(max_entries=3, clock=clock)
+    await check_pop_once(store)
+
+    address = wallet()
+    await store.put(address, "short-lived", ttl_seconds=10)
+    clock.now += 9.9
+    check("a challenge is live until its TTL", (await store.pop(address)) == "short-lived")
+    await store.put(address, "short-lived", ttl_seconds=10)
+    clock.now += 10
+    check("an expired challenge pops None", await store.pop(address) is None)
+    check("expiry is counted", store.stats()["expired"] == 1)
+
+    wallets = [wallet() for _ in range(4)]
+    for ttl, address in zip((40, 10, 30, 20), wallets):
+        await store.put(address, f"ttl {ttl}", ttl_seconds=ttl)
+    check("capacity is enforced", store.stats()["entries"] == 3)
+    check("the challenge closest to expiry is evicted first", await store.pop(wallets[1]) is None)
+    check("the others survive eviction", [await store.pop(a) for a in (wallets[0], wallets[2], wallets[3])] == ["ttl 40", "ttl 30", "ttl 20"])
+
+    address = wallet()
+    for i in range(5000):
+        await store.put(address, str(i))
+    check("re-issuing to one wallet doesn't grow the expiry heap without bound", len(store._expiry_heap) <= 2 * store.stats()["entries"] + 1024)
+
+
+async def check_redis_store(redis):
+    print("RedisChallengeStore")
+    store = RedisChallengeStore(redis)
+    await check_pop_once(store)
+
+    address = wallet()
+    await store.put(address, "short-lived", ttl_seconds=1)
+    await asyncio.sleep(1.1)
+    check("Redis expires a challenge after its TTL", await store.pop(address) is None)
+
+    # Separate connections stand in for separate API workers racing to redeem one challenge
+    other_worker = RedisChallengeStore(redis.__class__.from_url(REDIS_URL))
+    await store.put(address, "shared")
+    results = await asyncio.gather(store.pop(address), other_worker.pop(address))
+    await other_worker.redis.aclose()
+    check("two workers can't both redeem one challenge", results.count("shared") == 1 and results.count(None) == 1)
+
+
+async def throughput(store: ChallengeStore, operations: int) -> float:
+    """put+pop pairs per second"""
+    wallets = [wallet() for _ in range(operations)]
+    started = time.perf_counter()
+    for address in wallets:
+        await store.put(address, "challenge")
+        await store.pop(address)
+    return operations / (time.perf_counter() - started)
+
+
+async def main(operations: int):
+    await check_memory_store()
+    stores = {"memory": InMemoryChallengeStore()}
+    redis = get_redis()
+    if redis is not None:
+        await check_redis_store(redis)
+        stores["redis"] = RedisChallengeStore(redis)
+    else:
+        print("RedisChallengeStore: skipped (REDIS_URL not set or redis not installed)")
+
+    print(f"\n{'store':>7} {'put+pop/s':>10}")
+    for name, store in stores.items():
+        print(f"{name:>7} {await throughput(store, operations):>10,.0f}")
+    await close_redis()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--operations", type=int, default=20_000, help="put+pop pairs per store (Redis runs are bounded by round trips)")
+    args = parser.parse_args()
+    asyncio.run(main(args.operations))
@@ -0,0 +1,97 @@
+"""Login latency: many wallets redeeming challenges at /auth/verify at once, against a real Postgres.
+
+Requires DATABASE_URL (read from the environment or .env). Each round issues one challenge per
+wallet, then fires every /auth/verify concurrently and reports latency percentiles; the first
+round creates the users, the second logs the same wallets in again. Benchmark users are deleted
+afterwards.
+
+Run from backend/:  python -m benchmarks.bench_login [--logins N] [--rounds N]
+"""
+import argparse
+import asyncio
+import os
+import secrets
+import statistics
+import time
+
+import httpx
+from dotenv import load_dotenv
+from fastapi import FastAPI
+
+from routers import auth
+from services.database import database
+
+app = FastAPI()
+app.include_router(auth.router)
+
+BASE58_ALPHABET = "rpshnaf39wBUDNEGHJKLM4PQRST7VWXYZ2bcdeCg65jkm8oFqi1tuvAxyz"
+
+
+def make_wallets(count: int):
+    # Address-shaped but never on ledger; the xumm_universal_auth flow doesn't check signatures
+    return ["r" + "".join(secrets.choice(BASE58_ALPHABET) for _ in range(33)) for _ in range(count)]
+
+
+async def login(client: httpx.AsyncClient, wallet_address: str, challenge: str) -> float:
+    started = time.perf_counter()
+    response = await client.post("/auth/verify", json={
+        "wallet_address": wallet_address,
+        "signature": "xumm_universal_auth",
+        "challenge": challenge,
+        "xumm_sdk_auth": True,
+    })
+    response.raise_for_status()
+    return (time.perf_counter() - started) * 1000
+
+
+async def run_round(client: httpx.AsyncClient, wallets) -> list:
+    challenges = []
+    for wallet_address in wallets:
+        response = await client.post("/auth/challenge", json={"wallet_address": wallet_address})
+        response.raise_for_status()
+        challenges.append(response.json()["challenge"])
+    results = await asyncio.gather(
+        *(login(client, wallet, challenge) for wallet, challenge in zip(wallets, challenges)),
+        return_exceptions=True
+    )
+    failures = [result for result in results if isinstance(result, Exception)]
+    if failures:
+        print(f"  {len(failures)} logins failed, e.g. {failures[0]!r}")
+    return [result for result in results if not isinstance(result, Exception)]
+
+
+def percentile(latencies, fraction: float) -> float:
+    ordered = sorted(latencies)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def main(logins: int, rounds: int):
+    load_dotenv()
+    db_url = os.environ.get("DATABASE_URL")
+    if not db_url:
+        raise SystemExit("DATABASE_URL is required")
+    await database.connect(db_url)
+    wallets = make_wallets(logins)
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            print(f"{logins} concurrent logins, pool max_size={database.max_size}")
+            print(f"{'round':>10} {'ok':>5} {'p50 (ms)':>9} {'p99 (ms)':>9} {'mean (ms)':>10}")
+            for round_number in range(rounds):
+                latencies = await run_round(client, wallets)
+                label = "first" if round_number == 0 else f"repeat {round_number}"
+                if latencies:
+                    print(f"{label:>10} {len(latencies):>5} {percentile(latencies, 0.5):>9.1f} "
+                          f"{percentile(latencies, 0.99):>9.1f} {statistics.fmean(latencies):>10.1f}")
+    finally:
+        async with database.acquire() as conn:
+            await conn.execute("DELETE FROM users WHERE wallet_address = ANY($1::text[])", wallets)
+        await database.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=500, help="concurrent logins per round")
+    parser.add_argument("--rounds", type=int, default=3, help="first round creates users, later ones log them in again")
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.rounds))
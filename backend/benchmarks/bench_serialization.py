@@ -0,0 +1,80 @@
+"""Goal status response: pydantic models + FastAPI response_model vs trusted rows + orjson.
+
+Run from backend/:  python -m benchmarks.bench_serialization [--iterations N]
+"""
+import argparse
+import asyncio
+import time
+from datetime import date
+from uuid import uuid4
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from models import GoalStatusResponse, Task
+from services.serialization import goal_status_payload, trusted_response
+
+TASK_COUNTS = (10, 100, 1000)
+
+
+def make_rows(task_count: int):
+    """A goals row and its task rows shaped like asyncpg returns them (extra columns included)"""
+    goal_id = uuid4()
+    goal = {
+        "id": goal_id, "title": "Run a half marathon", "duration_weeks": 12, "xrp_amount": 25.0,
+        "start_date": date(2026, 1, 5), "end_date": date(2026, 3, 30), "status": "incomplete",
+        "settled_at": None, "plan_status": "ready", "total_tasks": task_count, "verified_tasks": 0,
+        "user_id": uuid4(),
+    }
+    tasks = [
+        {
+            "id": uuid4(), "goal_id": goal_id, "week_number": i % 12 + 1, "title": f"Task {i}",
+            "verification_method": "Upload a screenshot of the run summary", "expected_data_type": "image",
+            "verified": i % 3 == 0,
+        }
+        for i in range(task_count)
+    ]
+    return goal, tasks
+
+
+RESPONSE_FIELD = create_model_field(name="response", type_=GoalStatusResponse, mode="serialization")
+
+
+async def current_path(goal, tasks) -> bytes:
+    # What the endpoint used to do: build models, then FastAPI validates and serializes
+    # them again for response_model and renders with the stdlib json encoder
+    response = GoalStatusResponse(**goal, tasks=[Task(**task) for task in tasks])
+    content = await serialize_response(field=RESPONSE_FIELD, response_content=response)
+    return JSONResponse(content).body
+
+
+async def fast_path(goal, tasks) -> bytes:
+    return trusted_response(goal_status_payload(goal, tasks)).body
+
+
+async def measure(path, goal, tasks, iterations: int) -> float:
+    """Mean microseconds per response"""
+    for _ in range(min(iterations, 10)):
+        await path(goal, tasks)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await path(goal, tasks)
+    return (time.perf_counter() - started) / iterations * 1_000_000
+
+
+async def main(iterations: int):
+    print(f"{'tasks':>6} {'current (us)':>14} {'fast (us)':>11} {'speedup':>8}")
+    for task_count in TASK_COUNTS:
+        goal, tasks = make_rows(task_count)
+        runs = max(iterations // task_count, 20)
+        current = await measure(current_path, goal, tasks, runs)
+        fast = await measure(fast_path, goal, tasks, runs)
+        print(f"{task_count:>6} {current:>14.1f} {fast:>11.1f} {current / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20_000, help="responses per size, scaled down as tasks grow")
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations))
@@ -0,0 +1,76 @@
+"""Wallet signature verification throughput: verifications/sec per core, inline and through the process pool.
+
+Run from backend/:  python -m benchmarks.bench_signatures [--signatures N] [--workers N]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from xrpl import CryptoAlgorithm
+from xrpl.core import keypairs
+from xrpl.utils import str_to_hex
+
+from services.signature_verifier import SignatureVerifier, is_valid_signature
+
+
+def make_logins(algorithm: CryptoAlgorithm, count: int, wallets: int = 50):
+    """(address, message, signature, public_key) signed the way wallets sign challenges"""
+    keys = [keypairs.derive_keypair(keypairs.generate_seed(algorithm=algorithm)) for _ in range(wallets)]
+    logins = []
+    for i in range(count):
+        public_key, private_key = keys[i % wallets]
+        message = f"Sign this message to authenticate with Ripple Goals:\n\nChallenge: {i}"
+        logins.append((keypairs.derive_classic_address(public_key), message, keypairs.sign(str_to_hex(message), private_key), public_key))
+    return logins
+
+
+def inline_rate(logins) -> float:
+    started = time.perf_counter()
+    for _, message, signature, public_key in logins:
+        assert is_valid_signature(message.encode(), signature, public_key)
+    return len(logins) / (time.perf_counter() - started)
+
+
+async def pool_rate(verifier: SignatureVerifier, logins) -> float:
+    await asyncio.gather(*(verifier.verify(*login) for login in logins[:verifier.workers]))  # start the workers
+    started = time.perf_counter()
+    results = await asyncio.gather(*(verifier.verify(*login) for login in logins))
+    elapsed = time.perf_counter() - started
+    assert all(results)
+    return len(logins) / elapsed
+
+
+def derive_rates(verifier: SignatureVerifier, logins, repeats: int = 20):
+    """Address derivations per second without and with the per-key cache"""
+    keys = [public_key for *_, public_key in logins] * repeats
+    started = time.perf_counter()
+    for public_key in keys:
+        keypairs.derive_classic_address(public_key)
+    uncached = len(keys) / (time.perf_counter() - started)
+    started = time.perf_counter()
+    for public_key in keys:
+        verifier.derive_address(public_key)
+    return uncached, len(keys) / (time.perf_counter() - started)
+
+
+async def main(signatures: int, workers: int):
+    verifier = SignatureVerifier(workers=workers)
+    print(f"{'algorithm':>10} {'inline/s (1 core)':>18} {'pool/s':>8} {'pool/s per core':>16} {'derive/s':>9} {'cached derive/s':>16}")
+    try:
+        for algorithm in (CryptoAlgorithm.ED25519, CryptoAlgorithm.SECP256K1):
+            logins = make_logins(algorithm, signatures)
+            inline = inline_rate(logins)
+            pooled = await pool_rate(verifier, logins)
+            uncached, cached = derive_rates(verifier, logins)
+            print(f"{algorithm.value:>10} {inline:>18,.0f} {pooled:>8,.0f} {pooled / workers:>16,.0f} {uncached:>9,.0f} {cached:>16,.0f}")
+    finally:
+        verifier.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--signatures", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="process pool size")
+    args = parser.parse_args()
+    asyncio.run(main(args.signatures, args.workers))
@@ -1,65 +1,43 @@
 from fastapi import FastAPI, Depends, HTTPException, Body
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import os
-from supabase import create_client, Client
 from dotenv import load_dotenv
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from uuid import UUID
 from datetime import date
 from contextlib import asynccontextmanager # Added
+import asyncio
+import time
 import asyncpg # Added
 
-# Import routers
-from routers import goals, submissions, tasks, auth
-
+# Load .env before importing modules that read their configuration at import time
 load_dotenv()
 
-# SQL Definitions for table creation
-CREATE_GOALS_TABLE_SQL = """
-CREATE TABLE IF NOT EXISTS goals (
-    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
-    title TEXT NOT NULL,
-    duration_weeks INTEGER NOT NULL,
-    xrp_amount REAL NOT NULL,
-    start_date DATE NOT NULL DEFAULT CURRENT_DATE,
-    end_date DATE GENERATED ALWAYS AS (start_date + (duration_weeks * 7)) STORED,
-    status VARCHAR(50) NOT NULL DEFAULT 'incomplete' CHECK (status IN ('incomplete', 'completed')),
-    settled_at TIMESTAMP WITH TIME ZONE,
-    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE
-);
-"""
-
-CREATE_TASKS_TABLE_SQL = """
-CREATE TABLE IF NOT EXISTS tasks (
-    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
-    goal_id UUID NOT NULL REFERENCES goals(id) ON DELETE CASCADE,
-    week_number INTEGER NOT NULL,
-    title TEXT NOT NULL,
-    verification_method TEXT,
-    expected_data_type VARCHAR(50) NOT NULL CHECK (expected_data_type IN ('image', 'text')),
-    verified VARCHAR(50) NOT NULL DEFAULT 'false' CHECK (verified IN ('true', 'false'))
-);
-"""
-
-CREATE_SUBMISSIONS_TABLE_SQL = """
-CREATE TABLE IF NOT EXISTS submissions (
-    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
-    task_id UUID NOT NULL REFERENCES tasks(id) ON DELETE CASCADE,
-    submitted_data_url TEXT,
-    timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
-    verification_result TEXT CHECK (verification_result IN ('true', 'false')),
-    verification_comments TEXT
-);
-"""
-
-CREATE_USERS_TABLE_SQL = """
-CREATE TABLE IF NOT EXISTS users (
-    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
-    wallet_address VARCHAR(34) NOT NULL UNIQUE,
-    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
-    last_login TIMESTAMP WITH TIME ZONE
-);
-"""
+# Import routers
+from routers import goals, submissions, tasks, auth
+from services.verification_queue import verification_queue
+from services.database import database
+from services.goal_cache import goal_cache
+from services.redis_client import close_redis
+from services.auth import auth_service
+from services.revocation import token_revocations
+from services.signature_verifier import signature_verifier
+from services.migrations import apply_migrations, current_schema_version, latest_version
+from ai.plan_cache import plan_cache
+from ai.verification_cache import verification_cache
+from ai.image_preprocess import image_preprocessor
+from ai.fast_verifier import fast_verifier
+from ai.prompts import prompt_registry
+from ai.ai import warm_up_prompts
+from services.uploads import RequestSizeLimitMiddleware, UPLOAD_MAX_REQUEST_BYTES
+
+# Migrations are applied out of band (python run_migration.py); set this to apply them at boot instead
+DB_MIGRATE_ON_STARTUP = os.getenv("DB_MIGRATE_ON_STARTUP", "false").lower() == "true"
+
+# Components that must be up before /health/ready reports ready
+readiness: Dict[str, bool] = {"database": False, "schema": False, "verification_queue": False}
+startup_duration_ms: Optional[float] = None
 
 DB_INIT_ERROR_MESSAGE = "Database initialization error. Check DATABASE_URL in .env and ensure PostgreSQL server is accessible."
 
@@ -70,38 +48,25 @@ async def initialize_database():
         # You might want to raise an exception here or handle it as critical failure
         return
 
-    conn = None
     try:
-        print(f"Connecting to database for initialization...")
-        conn = await asyncpg.connect(db_url)
-        print("Successfully connected to database. Creating tables...")
-        # Create users table first (referenced by goals)
-        await conn.execute(CREATE_USERS_TABLE_SQL)
-        print("- 'users' table processed.")
-        
-        # Check if goals table needs user_id column
-        try:
-            # Try to add user_id column if it doesn't exist
-            await conn.execute("ALTER TABLE goals ADD COLUMN IF NOT EXISTS user_id UUID REFERENCES users(id) ON DELETE CASCADE;")
-            print("- 'goals' table user_id column added if missing.")
-        except Exception as e:
-            print(f"- Note: Could not add user_id column to goals table: {e}")
-        
-        await conn.execute(CREATE_GOALS_TABLE_SQL)
-        print("- 'goals' table processed.")
-        await conn.execute(CREATE_TASKS_TABLE_SQL)
-        print("- 'tasks' table processed.")
-        
-        # Add verification_comments column if it doesn't exist
-        try:
-            await conn.execute("ALTER TABLE submissions ADD COLUMN IF NOT EXISTS verification_comments TEXT;")
-            print("- 'submissions' table verification_comments column added if missing.")
-        except Exception as e:
-            print(f"- Note: Could not add verification_comments column to submissions table: {e}")
-        
-        await conn.execute(CREATE_SUBMISSIONS_TABLE_SQL)
-        print("- 'submissions' table processed.")
-        print("Database tables initialized successfully.")
+        print(f"Creating database connection pool...")
+        await database.connect(db_url)
+        readiness["database"] = True
+        print("Database connection pool ready. Checking schema version...")
+        expected_version = latest_version()
+        async with database.acquire() as conn:
+            # One-row read on the fast path; DDL only runs when the schema is behind and startup migrations are enabled
+            schema_version = await current_schema_version(conn)
+            if schema_version < expected_version and DB_MIGRATE_ON_STARTUP:
+                print(f"Schema version {schema_version} is behind {expected_version}. Applying pending migrations...")
+                for migration in await apply_migrations(conn):
+                    print(f"- migration {migration.version}_{migration.name} applied.")
+                schema_version = await current_schema_version(conn)
+        if schema_version >= expected_version:
+            readiness["schema"] = True
+            print(f"Database schema is up to date (version {schema_version}).")
+        else:
+            print(f"!!! Database schema version {schema_version} is behind {expected_version}. Run `python run_migration.py`; this worker stays not-ready until then.")
     except asyncpg.exceptions.InvalidPasswordError as e:
         print(f"!!! Database Connection Error: Invalid password. Please check your DATABASE_URL. Details: {e}")
     except asyncpg.exceptions.CannotConnectNowError as e:
@@ -109,24 +74,42 @@ async def initialize_database():
     except Exception as e:
         print(f"!!! An error occurred during database initialization: {e}")
         print(f"{DB_INIT_ERROR_MESSAGE}")
-    finally:
-        if conn:
-            await conn.close()
-            print("Database connection closed.")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    global startup_duration_ms
+    started = time.perf_counter()
     print("Application startup: Initializing database...")
     await initialize_database()
     print("Database initialization process finished.")
+    if readiness["schema"]:
+        await goals.fail_stranded_plan_generations()
+        await submissions.fail_stranded_verifications()
+    await verification_queue.start()
+    readiness["verification_queue"] = True
+    await token_revocations.start()
+    # Token counting / context cache creation talk to Gemini; don't hold up startup for them
+    prompt_warm_up = asyncio.create_task(warm_up_prompts())
+    startup_duration_ms = round((time.perf_counter() - started) * 1000, 1)
+    print(f"Application startup finished in {startup_duration_ms} ms (ready: {all(readiness.values())})")
     yield
+    for component in readiness:
+        readiness[component] = False
+    prompt_warm_up.cancel()
+    await verification_queue.stop()
+    await token_revocations.stop()
+    image_preprocessor.shutdown()
+    signature_verifier.shutdown()
+    await database.close()
+    await close_redis()
     print("Application shutdown.")
 
 app = FastAPI(
     title="Habit Goals API with XRP Stakes",
     description="API for managing habit goals with XRP stakes and AI task generation",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -150,14 +133,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Supabase Connection
-SUPABASE_URL: str = os.environ.get("SUPABASE_URL")
-SUPABASE_KEY: str = os.environ.get("SUPABASE_KEY")
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise RuntimeError("SUPABASE_URL and SUPABASE_KEY must be set in .env file")
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Reject oversized submission bodies while they stream in, before multipart parsing buffers them
+# (1 MiB of slack covers the text fields and multipart framing)
+app.add_middleware(
+    RequestSizeLimitMiddleware,
+    paths=["/submissions/submit_task_form/"],
+    max_bytes=UPLOAD_MAX_REQUEST_BYTES + 1024 * 1024,
+)
 
 # Include routers
 app.include_router(auth.router)
@@ -180,3 +162,31 @@ async def root():
         }
     }
 
+@app.get("/health/live")
+async def liveness():
+    """Liveness probe: the process is up and serving requests"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness_probe():
+    """Readiness probe: 200 once the pool is warm, the schema is current and workers are running"""
+    ready = all(readiness.values()) and database.is_connected
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not_ready", "components": readiness, "startup_ms": startup_duration_ms}
+    )
+
+@app.get("/metrics")
+async def metrics():
+    """In-process cache, queue and connection pool counters for this worker"""
+    return {
+        "plan_cache": plan_cache.stats(),
+        "verification_cache": verification_cache.stats(),
+        "image_preprocessing": image_preprocessor.stats(),
+        "fast_path_verifier": fast_verifier.stats(),
+        "prompts": prompt_registry.stats(),
+        "database_pool": database.stats(),
+        "goal_cache": goal_cache.stats(),
+        "auth": auth_service.stats(),
+    }
+
@@ -0,0 +1,93 @@
+-- Migration: Baseline schema (previously created by main.initialize_database on every boot)
+-- Safe to apply to databases created before the migration runner existed: every
+-- statement is IF NOT EXISTS, and columns added since the first release are ALTERed in.
+
+CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+
+CREATE TABLE IF NOT EXISTS users (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    wallet_address VARCHAR(34) NOT NULL UNIQUE,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    last_login TIMESTAMP WITH TIME ZONE
+);
+
+CREATE TABLE IF NOT EXISTS goals (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    title TEXT NOT NULL,
+    duration_weeks INTEGER NOT NULL,
+    xrp_amount REAL NOT NULL,
+    start_date DATE NOT NULL DEFAULT CURRENT_DATE,
+    end_date DATE GENERATED ALWAYS AS (start_date + (duration_weeks * 7)) STORED,
+    status VARCHAR(50) NOT NULL DEFAULT 'incomplete' CHECK (status IN ('incomplete', 'completed')),
+    settled_at TIMESTAMP WITH TIME ZONE,
+    plan_status VARCHAR(20) NOT NULL DEFAULT 'ready' CHECK (plan_status IN ('generating', 'ready', 'failed')),
+    total_tasks INTEGER NOT NULL DEFAULT 0,
+    verified_tasks INTEGER NOT NULL DEFAULT 0,
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE
+);
+
+ALTER TABLE goals ADD COLUMN IF NOT EXISTS user_id UUID REFERENCES users(id) ON DELETE CASCADE;
+ALTER TABLE goals ADD COLUMN IF NOT EXISTS plan_status VARCHAR(20) NOT NULL DEFAULT 'ready' CHECK (plan_status IN ('generating', 'ready', 'failed'));
+
+CREATE TABLE IF NOT EXISTS tasks (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    goal_id UUID NOT NULL REFERENCES goals(id) ON DELETE CASCADE,
+    week_number INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    verification_method TEXT,
+    expected_data_type VARCHAR(50) NOT NULL CHECK (expected_data_type IN ('image', 'text')),
+    verified VARCHAR(50) NOT NULL DEFAULT 'false' CHECK (verified IN ('true', 'false'))
+);
+
+-- Completion counters on goals, backfilled from tasks the first time they are added
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'goals' AND column_name = 'verified_tasks'
+    ) THEN
+        ALTER TABLE goals ADD COLUMN IF NOT EXISTS total_tasks INTEGER NOT NULL DEFAULT 0;
+        ALTER TABLE goals ADD COLUMN verified_tasks INTEGER NOT NULL DEFAULT 0;
+        UPDATE goals g
+        SET total_tasks = c.total, verified_tasks = c.verified
+        FROM (
+            SELECT goal_id, count(*) AS total, count(*) FILTER (WHERE verified = 'true') AS verified
+            FROM tasks GROUP BY goal_id
+        ) c
+        WHERE g.id = c.goal_id;
+    END IF;
+END $$;
+
+CREATE TABLE IF NOT EXISTS submissions (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    task_id UUID NOT NULL REFERENCES tasks(id) ON DELETE CASCADE,
+    submitted_data_url TEXT,
+    timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    verification_result TEXT CHECK (verification_result IN ('true', 'false')),
+    verification_comments TEXT,
+    verification_status VARCHAR(20) NOT NULL DEFAULT 'completed' CHECK (verification_status IN ('pending', 'running', 'completed', 'failed'))
+);
+
+ALTER TABLE submissions ADD COLUMN IF NOT EXISTS verification_comments TEXT;
+ALTER TABLE submissions ADD COLUMN IF NOT EXISTS verification_status VARCHAR(20) NOT NULL DEFAULT 'completed' CHECK (verification_status IN ('pending', 'running', 'completed', 'failed'));
+
+-- Shared tier of the create_tasks plan cache (ai/plan_cache.py)
+CREATE TABLE IF NOT EXISTS ai_plan_cache (
+    cache_key TEXT PRIMARY KEY,
+    normalized_goal TEXT NOT NULL,
+    duration_weeks INTEGER NOT NULL,
+    model TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    plan JSONB NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Durable tier of the AI verdict cache (ai/verification_cache.py)
+CREATE TABLE IF NOT EXISTS ai_verification_cache (
+    cache_key TEXT PRIMARY KEY,
+    modality VARCHAR(10) NOT NULL,
+    model TEXT NOT NULL,
+    is_valid BOOLEAN NOT NULL,
+    comments TEXT,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,16 @@
+-- Migration: Indexes for the hot queries in services/repository.py and web3/cron.py
+
+-- A goal's tasks, ordered by week (goal status, task lists, plan replacement)
+CREATE INDEX IF NOT EXISTS idx_tasks_goal_week ON tasks (goal_id, week_number);
+
+-- A task's submissions in time order
+CREATE INDEX IF NOT EXISTS idx_submissions_task_timestamp ON submissions (task_id, timestamp);
+
+-- A user's goals (ownership checks, goal lists, the cron's users -> goals embed)
+CREATE INDEX IF NOT EXISTS idx_goals_user_id ON goals (user_id);
+
+-- Settlement scans only ever look at goals that have not been settled yet
+CREATE INDEX IF NOT EXISTS idx_goals_unsettled_end_date ON goals (end_date) WHERE settled_at IS NULL;
+
+-- Superseded by the partial index above
+DROP INDEX IF EXISTS idx_goals_end_date_settled;
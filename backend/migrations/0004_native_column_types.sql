@@ -0,0 +1,37 @@
+-- Migration: Store flags as BOOLEAN and goal status as a Postgres enum
+-- tasks.verified and submissions.verification_result held the strings 'true'/'false';
+-- goals.status was VARCHAR(50) with a CHECK constraint. Each conversion is skipped when
+-- the column already has the target type.
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'goal_status') THEN
+        CREATE TYPE goal_status AS ENUM ('incomplete', 'completed', 'settled_complete', 'settled_failed');
+    END IF;
+
+    IF (SELECT data_type FROM information_schema.columns
+        WHERE table_name = 'goals' AND column_name = 'status') <> 'USER-DEFINED' THEN
+        ALTER TABLE goals DROP CONSTRAINT IF EXISTS goals_status_check;
+        ALTER TABLE goals ALTER COLUMN status DROP DEFAULT;
+        ALTER TABLE goals ALTER COLUMN status TYPE goal_status USING status::goal_status;
+        ALTER TABLE goals ALTER COLUMN status SET DEFAULT 'incomplete';
+    END IF;
+
+    IF (SELECT data_type FROM information_schema.columns
+        WHERE table_name = 'tasks' AND column_name = 'verified') <> 'boolean' THEN
+        ALTER TABLE tasks DROP CONSTRAINT IF EXISTS tasks_verified_check;
+        ALTER TABLE tasks ALTER COLUMN verified DROP DEFAULT;
+        ALTER TABLE tasks ALTER COLUMN verified TYPE BOOLEAN USING verified = 'true';
+        ALTER TABLE tasks ALTER COLUMN verified SET DEFAULT false;
+    END IF;
+
+    IF (SELECT data_type FROM information_schema.columns
+        WHERE table_name = 'submissions' AND column_name = 'verification_result') <> 'boolean' THEN
+        ALTER TABLE submissions DROP CONSTRAINT IF EXISTS submissions_verification_result_check;
+        -- NULL (verification still pending) stays NULL
+        ALTER TABLE submissions ALTER COLUMN verification_result TYPE BOOLEAN USING verification_result = 'true';
+    END IF;
+END $$;
+
+-- A goal's outstanding tasks (progress views, "what's left this week")
+CREATE INDEX IF NOT EXISTS idx_tasks_goal_unverified ON tasks (goal_id, week_number) WHERE NOT verified;
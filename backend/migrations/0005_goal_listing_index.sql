@@ -0,0 +1,7 @@
+-- Migration: Index for the keyset-paginated goal listing (GET /goals)
+
+-- A user's goals in (start_date, id) order; scanned backwards for newest-first pages
+CREATE INDEX IF NOT EXISTS idx_goals_user_start_date_id ON goals (user_id, start_date, id);
+
+-- Superseded by the index above, which has user_id as its leading column
+DROP INDEX IF EXISTS idx_goals_user_id;
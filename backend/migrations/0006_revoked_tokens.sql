@@ -0,0 +1,12 @@
+-- Migration: Denylist of revoked access tokens (POST /auth/logout)
+
+-- One row per revoked token id (the JWT's jti); rows are only needed until the token
+-- would have expired anyway, and are purged after that by the API workers
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    jti TEXT PRIMARY KEY,
+    user_id UUID,
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    revoked_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_revoked_tokens_expires_at ON revoked_tokens (expires_at);
@@ -0,0 +1,9 @@
+-- Migration: When each goal's current task plan generation was requested
+
+-- Plan generation runs in-process, so a restart can strand goals in 'generating'; this
+-- timestamp lets workers tell a stranded generation from one that is still running.
+-- Existing rows stay NULL (treated as stranded once no longer needed); new goals get now()
+ALTER TABLE goals ADD COLUMN IF NOT EXISTS plan_requested_at TIMESTAMP WITH TIME ZONE;
+ALTER TABLE goals ALTER COLUMN plan_requested_at SET DEFAULT CURRENT_TIMESTAMP;
+
+CREATE INDEX IF NOT EXISTS idx_goals_plan_generating ON goals (plan_requested_at) WHERE plan_status = 'generating';
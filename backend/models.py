@@ -7,14 +7,19 @@ from enum import Enum
 class GoalStatusEnum(str, Enum):
     INCOMPLETE = "incomplete"
     COMPLETED = "completed"
+    SETTLED_COMPLETE = "settled_complete"
+    SETTLED_FAILED = "settled_failed"
 
-class TaskVerifiedEnum(str, Enum):
-    TRUE = "true"
-    FALSE = "false"
+class PlanStatusEnum(str, Enum):
+    GENERATING = "generating"
+    READY = "ready"
+    FAILED = "failed"
 
-class SubmissionVerificationResultEnum(str, Enum):
-    TRUE = "true"
-    FALSE = "false"
+class SubmissionStatusEnum(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
 
 
 class ExpectedDataTypeEnum(str, Enum):
@@ -35,6 +40,7 @@ class WalletAuthVerify(BaseModel):
     challenge: str
     xaman_payload_uuid: Optional[str] = None
     xumm_sdk_auth: Optional[bool] = False
+    public_key: Optional[str] = None  # hex signing key; required when signature is a raw XRPL signature
 
 class AuthToken(BaseModel):
     access_token: str
@@ -62,7 +68,7 @@ class TaskBase(BaseModel):
     title: str
     verification_method: str
     expected_data_type: ExpectedDataTypeEnum
-    verified: TaskVerifiedEnum = TaskVerifiedEnum.FALSE
+    verified: bool = False
 
 class TaskCreate(TaskBase):
     pass
@@ -85,12 +91,16 @@ class GoalCreateRequest(GoalBase): # For API request
 class GoalCreate(GoalBase): # For DB insertion
     start_date: date = Field(default_factory=date.today)
     status: GoalStatusEnum = GoalStatusEnum.INCOMPLETE
+    plan_status: PlanStatusEnum = PlanStatusEnum.GENERATING
     user_id: UUID  # Add user association
 
 class Goal(GoalBase):
     id: UUID = Field(default_factory=uuid4)
     start_date: date
     status: GoalStatusEnum
+    plan_status: PlanStatusEnum = PlanStatusEnum.READY
+    total_tasks: int = 0
+    verified_tasks: int = 0
     user_id: UUID  # Add user association
     tasks: List[Task] = []
 
@@ -107,18 +117,45 @@ class SubmissionCreateRequest(BaseModel): # For API request
 
 class SubmissionCreate(SubmissionBase): # For DB insertion
     timestamp: datetime = Field(default_factory=datetime.utcnow)
-    verification_result: Optional[SubmissionVerificationResultEnum] = None
+    verification_result: Optional[bool] = None
     verification_comments: Optional[str] = None
+    verification_status: SubmissionStatusEnum = SubmissionStatusEnum.COMPLETED
 
 class Submission(SubmissionBase):
     id: UUID = Field(default_factory=uuid4)
     timestamp: datetime
-    verification_result: Optional[SubmissionVerificationResultEnum] = None
+    verification_result: Optional[bool] = None
     verification_comments: Optional[str] = None
+    verification_status: SubmissionStatusEnum = SubmissionStatusEnum.COMPLETED
 
     class Config:
         from_attributes = True
 
+class SubmissionJob(BaseModel): # Returned by async-mode submissions and the job status endpoint
+    job_id: UUID
+    status: SubmissionStatusEnum
+    submission: Optional[Submission] = None
+    error: Optional[str] = None
+
 class GoalStatusResponse(Goal):
     # tasks are already included in Goal model
     pass
+
+class WeekProgress(BaseModel):
+    week_number: int
+    total: int
+    verified: int
+
+class GoalSummary(GoalBase): # A goal in the list view: per-week counts instead of task rows
+    id: UUID
+    start_date: date
+    status: GoalStatusEnum
+    plan_status: PlanStatusEnum = PlanStatusEnum.READY
+    total_tasks: int = 0
+    verified_tasks: int = 0
+    user_id: UUID
+    weeks: List[WeekProgress] = []
+
+class GoalListResponse(BaseModel):
+    goals: List[GoalSummary]
+    next_cursor: Optional[str] = None # Pass back as ?cursor= for the next page; None on the last page
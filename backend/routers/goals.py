@@ -1,26 +1,23 @@
-from fastapi import APIRouter, HTTPException, Depends
-from uuid import UUID
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Query, Request
+from fastapi.responses import StreamingResponse
+from datetime import date
+from typing import List, Optional, Tuple
+from uuid import UUID, uuid4
+import asyncio
+import base64
 import os
-from supabase import create_client, Client
-from dotenv import load_dotenv
 
-from ai.ai import create_tasks as ai_create_tasks # Import the AI function
+from ai.plan_cache import plan_cache # Cached front for the AI create_tasks function
+from ai.ai import stream_create_tasks
+from ai.plan_stream import WeekStreamParser
 from models import (
-    GoalCreateRequest, GoalCreate, GoalStatusResponse,
-    Task, TaskCreate
+    GoalCreateRequest, GoalCreate, GoalStatusResponse, GoalListResponse,
+    GoalStatusEnum, TaskCreate, PlanStatusEnum
 )
 from routers.auth import get_current_user_dep
-
-load_dotenv()
-
-# Supabase Connection
-SUPABASE_URL: str = os.environ.get("SUPABASE_URL")
-SUPABASE_KEY: str = os.environ.get("SUPABASE_KEY")
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise RuntimeError("SUPABASE_URL and SUPABASE_KEY must be set in .env file")
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+from services.goal_cache import goal_cache, etag_response
+from services.repository import repository
+from services.serialization import dumps, goal_status_payload, goal_summary_payload, task_payload, trusted_response
 
 router = APIRouter(
     prefix="/goals",
@@ -28,82 +25,84 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-@router.get("/status/{goal_id}", response_model=GoalStatusResponse)
-async def get_goal_status(
-    goal_id: UUID,
-    current_user: dict = Depends(get_current_user_dep)
-):
-    # 1. Fetch goal (ensure it belongs to the current user)
+# Background plan generation retry policy
+PLAN_GENERATION_MAX_ATTEMPTS = int(os.getenv("PLAN_GENERATION_MAX_ATTEMPTS", "3"))
+PLAN_GENERATION_RETRY_BACKOFF_SECONDS = 2
+# Plans are generated in-process, so a restart loses them; a goal still 'generating' after
+# this long is treated as stranded (failed at startup, retryable via /plan/retry)
+PLAN_GENERATION_TIMEOUT_SECONDS = float(os.getenv("PLAN_GENERATION_TIMEOUT_SECONDS", "900"))
+
+# Page size for GET /goals
+GOAL_LIST_DEFAULT_LIMIT = 20
+GOAL_LIST_MAX_LIMIT = 100
+
+# Keeps fallback plan generations started from streaming requests alive until they finish
+_fallback_generations: set = set()
+
+def _encode_cursor(goal: dict) -> str:
+    raw = f"{goal['start_date'].isoformat()}|{goal['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[date, UUID]:
     try:
-        goal_response = supabase.table("goals").select("*").eq("id", str(goal_id)).eq("user_id", current_user["user_id"]).maybe_single().execute()
-        if not goal_response or not goal_response.data:
-            raise HTTPException(status_code=404, detail="Goal not found")
-        goal_db_data = goal_response.data
-    except HTTPException:
-        # Re-raise HTTPExceptions (like 404) as-is
-        raise
-    except Exception as e:
-        # Log the error for debugging
-        print(f"Error fetching goal {goal_id}: {e}")
-        raise HTTPException(status_code=500, detail="Error retrieving goal information")
+        start_date, goal_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return date.fromisoformat(start_date), UUID(goal_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
-    # 2. Fetch associated tasks
+
+@router.get("", response_model=GoalListResponse)
+async def list_goals(
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(GOAL_LIST_DEFAULT_LIMIT, ge=1, le=GOAL_LIST_MAX_LIMIT),
+    status: Optional[List[GoalStatusEnum]] = Query(None, description="Only goals with these statuses"),
+    current_user: dict = Depends(get_current_user_dep)
+):
+    """The current user's goals, newest first, with per-week verified/total task counts"""
+    after = _decode_cursor(cursor) if cursor else None
     try:
-        tasks_response = supabase.table("tasks").select("*").eq("goal_id", str(goal_id)).order("week_number").execute()
-        tasks_db_data = tasks_response.data if tasks_response and tasks_response.data else []
+        # One extra row tells us whether there is a next page
+        goals = await repository.list_goals(current_user["user_id"], limit + 1, statuses=status, after=after)
     except Exception as e:
-        # Log the error for debugging
-        print(f"Error fetching tasks for goal {goal_id}: {e}")
-        tasks_db_data = []
+        print(f"Error listing goals for user {current_user['user_id']}: {e}")
+        raise HTTPException(status_code=500, detail="Error retrieving goals")
 
-    return GoalStatusResponse(
-        **goal_db_data,
-        tasks=[Task(**task) for task in tasks_db_data]
-    )
+    next_cursor = _encode_cursor(goals[limit - 1]) if len(goals) > limit else None
+    return trusted_response({
+        "goals": [goal_summary_payload(goal) for goal in goals[:limit]],
+        "next_cursor": next_cursor,
+    })
 
 
-@router.post("/create", response_model=GoalStatusResponse)
-async def create_goal(
-    goal_data: GoalCreateRequest,
+@router.get("/status/{goal_id}", response_model=GoalStatusResponse)
+async def get_goal_status(
+    goal_id: UUID,
+    request: Request,
     current_user: dict = Depends(get_current_user_dep)
 ):
-    # 1. Create the Goal in the database
-    goal_to_create = GoalCreate(
-        title=goal_data.title,
-        duration_weeks=goal_data.duration_weeks,
-        xrp_amount=goal_data.xrp_amount,
-        user_id=UUID(current_user["user_id"])
-    )
-    try:
-        goal_response = supabase.table("goals").insert(goal_to_create.model_dump(mode='json')).execute()
-        if not goal_response.data:
-            raise HTTPException(status_code=500, detail=f"Could not create goal: {goal_response.error.message if goal_response.error else 'Unknown error'}")
-        created_goal_data = goal_response.data[0]
-        goal_id = UUID(created_goal_data['id'])
+    """A goal with its tasks; cached per goal and user, and 304 when If-None-Match still matches"""
+    async def load():
+        # Fetch goal and its tasks on one connection (ensure it belongs to the current user)
+        goal_db_data = await repository.get_goal_with_tasks(goal_id, current_user["user_id"])
+        if not goal_db_data:
+            return None
+        return goal_status_payload(goal_db_data, goal_db_data["tasks"])
 
+    try:
+        cached = await goal_cache.get_or_load(goal_id, f"status:{current_user['user_id']}", load)
     except Exception as e:
-        print(f"!!!!!!!!!!!! Database Exception Type: {type(e)}")
-        print(f"!!!!!!!!!!!! Database Exception Args: {e.args}")
-        print(f"!!!!!!!!!!!! Database Exception Details: {e}")
-        raise HTTPException(status_code=500, detail=f"Error creating goal in DB. Check server logs for details. Type: {type(e).__name__}")
+        # Log the error for debugging
+        print(f"Error fetching goal {goal_id}: {e}")
+        raise HTTPException(status_code=500, detail="Error retrieving goal information")
+    if cached is None:
+        raise HTTPException(status_code=404, detail="Goal not found")
 
-    # 2. Generate tasks for the goal (using AI placeholder)
-    try:
-        # Call the actual AI service function
-        ai_response = await ai_create_tasks(goal=goal_data.title, duration_weeks=goal_data.duration_weeks)
-        if not ai_response or "weeks" not in ai_response:
-            raise HTTPException(status_code=500, detail="AI service returned an invalid response.")
-        
-        # Process the AI response
-        ai_generated_tasks_structured = ai_response.get("weeks", [])
+    return etag_response(request, cached)
 
-    except Exception as e:
-        # Rollback goal creation or mark as needing task generation?
-        # For now, just raise error. Consider cleanup logic for production.
-        # supabase.table("goals").delete().eq("id", str(goal_id)).execute() # Example rollback
-        raise HTTPException(status_code=500, detail=f"Failed to generate tasks: {str(e)}")
 
-    # 3. Store generated tasks in the database
+def _build_task_rows(goal_id: UUID, ai_generated_tasks_structured: list) -> list:
+    """Flatten the AI week/task structure into rows for the tasks table"""
     tasks_to_insert = []
     for week_data in ai_generated_tasks_structured: # Iterate through weeks
         current_week_number = week_data.get("week")
@@ -119,45 +118,217 @@ async def create_goal(
                 verification_method=task_item.get("requirement"), # Map from 'requirement'
                 expected_data_type=task_item.get("requirement_modality") # Map from 'requirement_modality'
             )
-            tasks_to_insert.append(task_create.model_dump(mode='json'))
+            tasks_to_insert.append(task_create.model_dump())
+    return tasks_to_insert
+
+
+async def _store_plan(goal_id: UUID, ai_response: dict) -> list:
+    """Store a generated plan's tasks and mark the goal's plan ready; raises on any failure"""
+    if not ai_response or "weeks" not in ai_response:
+        raise ValueError("AI service returned an invalid response.")
+
+    tasks_to_insert = _build_task_rows(goal_id, ai_response.get("weeks", []))
+    return await repository.replace_goal_plan(goal_id, tasks_to_insert)
+
+
+async def _generate_plan_attempt(goal_id: UUID, title: str, duration_weeks: int):
+    """Generate tasks with the AI (or the plan cache) and store them; raises on any failure"""
+    ai_response = await plan_cache.get_or_create(goal=title, duration_weeks=duration_weeks)
+    await _store_plan(goal_id, ai_response)
+
 
-    if tasks_to_insert:
+async def generate_goal_plan(goal_id: UUID, title: str, duration_weeks: int):
+    """Background job: build the task plan for a goal, retrying with backoff"""
+    for attempt in range(1, PLAN_GENERATION_MAX_ATTEMPTS + 1):
         try:
-            tasks_response = supabase.table("tasks").insert(tasks_to_insert).execute()
-            if not tasks_response.data:
-                # Rollback goal creation
-                # supabase.table("goals").delete().eq("id", str(goal_id)).execute()
-                raise HTTPException(status_code=500, detail=f"Could not store tasks: {tasks_response.error.message if tasks_response.error else 'Unknown error'}")
-            # created_tasks_data = tasks_response.data
+            await _generate_plan_attempt(goal_id, title, duration_weeks)
+            print(f"Task plan ready for goal {goal_id} (attempt {attempt})")
+            return
         except Exception as e:
-            # supabase.table("goals").delete().eq("id", str(goal_id)).execute()
-            raise HTTPException(status_code=500, detail=f"Error storing tasks in DB: {str(e)}")
-    else:
-        pass
+            print(f"Task plan generation failed for goal {goal_id} (attempt {attempt}/{PLAN_GENERATION_MAX_ATTEMPTS}): {e}")
+            if attempt < PLAN_GENERATION_MAX_ATTEMPTS:
+                await asyncio.sleep(PLAN_GENERATION_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
 
-    # 4. Prepare and return the response
-    # Fetch the created goal again to include its ID and default fields
     try:
-        final_goal_response = supabase.table("goals").select("*").eq("id", str(goal_id)).single().execute()
-        if not final_goal_response or not final_goal_response.data:
-            raise HTTPException(status_code=404, detail="Newly created goal not found after task creation.")
-    except HTTPException:
-        raise
+        await repository.set_plan_status(goal_id, PlanStatusEnum.FAILED)
     except Exception as e:
-        print(f"Error fetching created goal {goal_id}: {e}")
-        raise HTTPException(status_code=500, detail="Error retrieving created goal information")
+        print(f"Error marking plan failed for goal {goal_id}: {e}")
+
 
-    # Fetch associated tasks
+async def fail_stranded_plan_generations():
+    """Startup sweep: fail plans whose generation was lost with a previous process"""
     try:
-        tasks_for_response = supabase.table("tasks").select("*").eq("goal_id", str(goal_id)).execute()
-        tasks_data = tasks_for_response.data if tasks_for_response and tasks_for_response.data else []
+        goal_ids = await repository.fail_stale_plan_generations(PLAN_GENERATION_TIMEOUT_SECONDS)
     except Exception as e:
-        print(f"Error fetching tasks for created goal {goal_id}: {e}")
-        tasks_data = []
+        print(f"Error failing stranded plan generations: {e}")
+        return
+    if goal_ids:
+        print(f"Marked {len(goal_ids)} stranded plan generation(s) as failed; they can be retried.")
 
-    return GoalStatusResponse(
-        **final_goal_response.data,
-        tasks=[Task(**task) for task in tasks_data]
+
+def _new_goal(goal_data: GoalCreateRequest, current_user: dict, plan_status: PlanStatusEnum = PlanStatusEnum.GENERATING) -> GoalCreate:
+    return GoalCreate(
+        title=goal_data.title,
+        duration_weeks=goal_data.duration_weeks,
+        xrp_amount=goal_data.xrp_amount,
+        user_id=UUID(current_user["user_id"]),
+        plan_status=plan_status
     )
 
 
+def _goal_db_error(e: Exception) -> HTTPException:
+    print(f"!!!!!!!!!!!! Database Exception Type: {type(e)}")
+    print(f"!!!!!!!!!!!! Database Exception Args: {e.args}")
+    print(f"!!!!!!!!!!!! Database Exception Details: {e}")
+    return HTTPException(status_code=500, detail=f"Error creating goal in DB. Check server logs for details. Type: {type(e).__name__}")
+
+
+async def _insert_goal(goal_data: GoalCreateRequest, current_user: dict) -> dict:
+    """Insert a new goal with plan_status 'generating' and return its row"""
+    try:
+        return await repository.insert_goal(_new_goal(goal_data, current_user).model_dump())
+    except Exception as e:
+        raise _goal_db_error(e)
+
+
+@router.post("/create", response_model=GoalStatusResponse, status_code=202)
+async def create_goal(
+    goal_data: GoalCreateRequest,
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(get_current_user_dep)
+):
+    """Create a goal and generate its tasks in the background.
+
+    The goal is returned immediately with plan_status 'generating'; poll
+    GET /goals/status/{goal_id} until it becomes 'ready' or 'failed'.
+    For progressive results use POST /goals/create/stream instead.
+    """
+    # A cached plan for the same (normalized) goal is stored together with the goal,
+    # in a single statement, so the goal is returned ready with its tasks
+    cached_plan = await plan_cache.get(goal_data.title, goal_data.duration_weeks)
+    if cached_plan is not None and "weeks" in cached_plan:
+        goal_id = uuid4()
+        goal_to_create = _new_goal(goal_data, current_user, PlanStatusEnum.READY)
+        try:
+            created_goal_data = await repository.create_goal_with_tasks(
+                {"id": goal_id, **goal_to_create.model_dump()},
+                _build_task_rows(goal_id, cached_plan["weeks"])
+            )
+        except Exception as e:
+            raise _goal_db_error(e)
+        return trusted_response(goal_status_payload(created_goal_data, created_goal_data["tasks"]), status_code=202)
+
+    created_goal_data = await _insert_goal(goal_data, current_user)
+    background_tasks.add_task(generate_goal_plan, created_goal_data['id'], goal_data.title, goal_data.duration_weeks)
+
+    return trusted_response(goal_status_payload(created_goal_data, []), status_code=202)
+
+
+def _sse(event: str, payload) -> str:
+    return f"event: {event}\ndata: {dumps(payload).decode()}\n\n"
+
+
+async def _store_week(goal_id: UUID, week_data: dict) -> list:
+    """Insert the tasks of a single plan week and return the stored rows"""
+    return await repository.insert_tasks_bulk(_build_task_rows(goal_id, [week_data]))
+
+
+async def _stream_plan_weeks(goal_id: UUID, title: str, duration_weeks: int):
+    """Yield (week_number, stored task rows) for each plan week as soon as it is available"""
+    cached_plan = await plan_cache.get(title, duration_weeks)
+    if cached_plan is not None:
+        for week_data in cached_plan.get("weeks", []):
+            yield week_data.get("week"), await _store_week(goal_id, week_data)
+        return
+
+    parser = WeekStreamParser()
+    async for chunk in stream_create_tasks(goal=title, duration_weeks=duration_weeks):
+        for week_data in parser.feed(chunk):
+            yield week_data.get("week"), await _store_week(goal_id, week_data)
+
+    plan = parser.result()
+    if not plan or "weeks" not in plan:
+        raise ValueError("AI service returned an invalid response.")
+    await plan_cache.put(title, duration_weeks, plan)
+
+
+@router.post("/create/stream")
+async def create_goal_stream(
+    goal_data: GoalCreateRequest,
+    current_user: dict = Depends(get_current_user_dep)
+):
+    """Create a goal and stream its task plan as server-sent events.
+
+    Emits a `goal` event with the new goal, a `week` event with the stored tasks of
+    each week as soon as the model finishes it, then `done` with the complete goal.
+    If generation fails or the client disconnects, the partial plan is replaced by
+    the regular background generation and (when still connected) an `error` event is sent.
+    """
+    created_goal_data = await _insert_goal(goal_data, current_user)
+    goal_id = created_goal_data['id']
+
+    async def event_stream():
+        finished = False
+        created_tasks = []
+        try:
+            yield _sse("goal", goal_status_payload(created_goal_data, []))
+
+            async for week_number, week_tasks in _stream_plan_weeks(goal_id, goal_data.title, goal_data.duration_weeks):
+                created_tasks.extend(week_tasks)
+                yield _sse("week", {
+                    "week": week_number,
+                    "tasks": [task_payload(task) for task in week_tasks],
+                })
+
+            # The current row: the task counters moved as each week was inserted
+            ready_goal_data = await repository.set_plan_status(goal_id, PlanStatusEnum.READY)
+            finished = True
+            yield _sse("done", goal_status_payload(ready_goal_data, created_tasks))
+
+        except Exception as e:
+            print(f"Streaming plan generation failed for goal {goal_id}, falling back to background generation: {e}")
+            yield _sse("error", {
+                "goal_id": str(goal_id),
+                "plan_status": PlanStatusEnum.GENERATING.value,
+                "detail": "Streaming the task plan failed; it is being generated in the background.",
+            })
+
+        finally:
+            if not finished:
+                # _store_plan clears the partially inserted weeks before storing the full plan
+                task = asyncio.get_running_loop().create_task(
+                    generate_goal_plan(goal_id, goal_data.title, goal_data.duration_weeks)
+                )
+                _fallback_generations.add(task)
+                task.add_done_callback(_fallback_generations.discard)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/{goal_id}/plan/retry", response_model=GoalStatusResponse, status_code=202)
+async def retry_goal_plan(
+    goal_id: UUID,
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(get_current_user_dep)
+):
+    """Restart task generation for a goal whose plan failed, or whose generation was lost
+    (still 'generating' after PLAN_GENERATION_TIMEOUT_SECONDS, e.g. across a restart)"""
+    try:
+        goal_db_data = await repository.restart_plan_generation(goal_id, current_user["user_id"], PLAN_GENERATION_TIMEOUT_SECONDS)
+        if goal_db_data is None and not await repository.get_goal(goal_id, current_user["user_id"]):
+            raise HTTPException(status_code=404, detail="Goal not found")
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error restarting plan generation for goal {goal_id}: {e}")
+        raise HTTPException(status_code=500, detail="Error retrieving goal information")
+    if goal_db_data is None:
+        raise HTTPException(status_code=409, detail="Only goals whose plan generation failed or stalled can be retried.")
+
+    background_tasks.add_task(generate_goal_plan, goal_id, goal_db_data["title"], goal_db_data["duration_weeks"])
+
+    return trusted_response(goal_status_payload(goal_db_data, []), status_code=202)
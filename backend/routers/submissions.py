@@ -1,27 +1,20 @@
-from fastapi import APIRouter, HTTPException, File, Form, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, File, Form, UploadFile, Request, Query, status
+from fastapi.responses import JSONResponse, StreamingResponse
 from uuid import UUID
-import os
-from supabase import create_client, Client
-from dotenv import load_dotenv
+import asyncio
 from typing import Optional, List, Literal # Added List, Literal
 import json # Added json
 
 from models import (
-    Submission, SubmissionCreate,
-    TaskVerifiedEnum, SubmissionVerificationResultEnum, GoalStatusEnum
+    Submission, SubmissionCreate, SubmissionJob,
+    GoalStatusEnum, SubmissionStatusEnum
 )
 from ai.ai import submit_task as ai_verify_submission_content # Import the AI function
-
-load_dotenv()
-
-# Supabase Connection
-SUPABASE_URL: str = os.environ.get("SUPABASE_URL")
-SUPABASE_KEY: str = os.environ.get("SUPABASE_KEY")
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise RuntimeError("SUPABASE_URL and SUPABASE_KEY must be set in .env file")
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+from ai.executor import cancel_on_disconnect
+from services.verification_queue import verification_queue, QueueFullError, TERMINAL_STATUSES, VERIFICATION_JOB_TIMEOUT_SECONDS
+from services.uploads import ingest_images, IngestedImage, IngestedUpload
+from services.repository import repository
+from routers.auth import get_current_user_dep
 
 
 router = APIRouter(
@@ -30,15 +23,104 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
+# How often SSE streams send a keep-alive comment while a job is still running
+JOB_EVENTS_KEEPALIVE_SECONDS = 15
+# Poll interval for jobs queued on a different worker process
+JOB_EVENTS_POLL_SECONDS = 1
+# Uploaded images are not kept past the request, so lost jobs can't be re-queued
+LOST_JOB_COMMENTS = "Verification was interrupted by a server restart. Please submit again."
+
 # Removed the placeholder verify_submission_ai function
 
-@router.post("/submit_task_form/", response_model=Submission) # Path changed, task_id removed from path
+async def _run_ai_verification(
+    task_title: str,
+    requirement: str,
+    modality: str,
+    submission_text: Optional[str],
+    submission_images: Optional[List[IngestedImage]]
+):
+    """Run AI verification and return (is_verified, comments)"""
+    ai_response_dict = await ai_verify_submission_content(
+        task=task_title,
+        requirement=requirement,
+        requirement_modality=modality,
+        submission_text=submission_text,
+        submission_images=submission_images
+    )
+
+    if not isinstance(ai_response_dict, dict) or "is_valid" not in ai_response_dict:
+        print(f"AI verification returned unexpected format: {ai_response_dict}")
+        raise HTTPException(status_code=500, detail="AI verification returned an invalid response format.")
+
+    # Extract comments from AI response
+    return bool(ai_response_dict.get("is_valid")), ai_response_dict.get("comments", "No comments provided")
+
+
+async def _apply_approved_submission(task_id: UUID, goal_id: UUID):
+    """Mark the task verified and complete the goal once every task is verified"""
+    try:
+        goal_counts = await repository.mark_task_verified(task_id)
+    except Exception as e:
+        print(f"Warning: Error updating task {task_id} / goal {goal_id} status: {str(e)}")
+        return
+    if goal_counts and goal_counts["status"] == GoalStatusEnum.COMPLETED.value:
+        print(f"Goal {goal_id} completed: {goal_counts['verified_tasks']}/{goal_counts['total_tasks']} tasks verified")
+
+
+def _make_verification_job_handler(
+    submission_id: str,
+    task_id: UUID,
+    goal_id: UUID,
+    task_title: str,
+    requirement: str,
+    modality: str,
+    submission_text: Optional[str],
+    upload: Optional[IngestedUpload]
+):
+    async def handler():
+        await repository.update_submission(submission_id, {"verification_status": SubmissionStatusEnum.RUNNING})
+        try:
+            is_verified, verification_comments = await _run_ai_verification(
+                task_title, requirement, modality, submission_text, upload.images if upload else None
+            )
+        except Exception as e:
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            await repository.update_submission(submission_id, {
+                "verification_status": SubmissionStatusEnum.FAILED,
+                "verification_comments": f"AI verification failed: {detail}"
+            })
+            raise
+        finally:
+            if upload:
+                upload.release()
+
+        submission_data = await repository.update_submission(submission_id, {
+            "verification_result": is_verified,
+            "verification_comments": verification_comments,
+            "verification_status": SubmissionStatusEnum.COMPLETED
+        })
+
+        if is_verified:
+            await _apply_approved_submission(task_id, goal_id)
+
+        return submission_data
+
+    return handler
+
+
+@router.post(
+    "/submit_task_form/",
+    response_model=Submission,
+    responses={202: {"model": SubmissionJob, "description": "Submission queued for verification (async_mode)"}}
+) # Path changed, task_id removed from path
 async def submit_task(
+    request: Request,
     task_id_str: str = Form(..., alias="task"), # 'task' from form is task_id string
     requirement_desc_form: str = Form(..., alias="requirement"), # 'requirement' from form
     requirement_modality_form: Literal["text", "image"] = Form(...), # 'requirement_modality' from form
     submission_text: Optional[str] = Form(None), # Was submitted_text
-    submission_images: Optional[List[UploadFile]] = File(None) # Was submitted_file (single)
+    submission_images: Optional[List[UploadFile]] = File(None), # Was submitted_file (single)
+    async_mode: bool = Query(False, description="Queue verification and return 202 with a job id instead of waiting")
 ):
     try:
         task_id = UUID(task_id_str)
@@ -47,39 +129,30 @@ async def submit_task(
 
     # 1. Verify task exists
     try:
-        task_response = supabase.table("tasks").select("*, goals(id)").eq("id", str(task_id)).maybe_single().execute()
-        if not task_response or not task_response.data:
-            raise HTTPException(status_code=404, detail=f"Task with ID {task_id} not found.")
-        
-        task_db_data = task_response.data
-    except HTTPException:
-        # Re-raise HTTPExceptions (like 404) as-is
-        raise
+        task_db_data = await repository.get_task_with_owner(task_id)
     except Exception as e:
         # Log the error for debugging
         print(f"Error fetching task {task_id}: {e}")
         raise HTTPException(status_code=500, detail="Error retrieving task information")
+    if not task_db_data:
+        raise HTTPException(status_code=404, detail=f"Task with ID {task_id} not found.")
 
     current_expected_modality = requirement_modality_form
 
-    if task_db_data["verified"] == TaskVerifiedEnum.TRUE.value:
+    if task_db_data["verified"]:
         raise HTTPException(status_code=400, detail="Task already verified.")
 
     actual_submission_url_for_db: Optional[str] = "No submission data processed" 
+    upload: Optional[IngestedUpload] = None
 
     if current_expected_modality == "image":
         if not submission_images or not any(f for f in submission_images if f is not None): 
             raise HTTPException(status_code=400, detail="Image file(s) are required for this task modality.")
         
-        image_filenames = []
-        for image_file in submission_images:
-            if image_file: 
-                if not image_file.content_type or not image_file.content_type.startswith("image/"):
-                    raise HTTPException(status_code=400, detail=f"Invalid file type: {image_file.filename}. Please upload images.")
-                image_filenames.append(image_file.filename)
-        
-        if not image_filenames: 
-             raise HTTPException(status_code=400, detail="No valid image files provided.")
+        # Checked in place in the parser's spool files; types are sniffed from magic bytes, not content_type.
+        # The same buffers are used for storage and AI verification.
+        upload = await ingest_images(submission_images, user_key=str(task_db_data["goal_user_id"]))
+        image_filenames = [image.filename for image in upload.images]
         actual_submission_url_for_db = json.dumps([f"placeholder_image_path/{fn}" for fn in image_filenames])
 
     elif current_expected_modality == "text":
@@ -89,32 +162,111 @@ async def submit_task(
     else:
         raise HTTPException(status_code=400, detail=f"Unsupported task modality: {current_expected_modality}")
 
+    goal_id = task_db_data["goal_id"]
+
+    if async_mode:
+        # Ownership of the upload passes to the queued job, which releases it when done
+        return await _enqueue_submission(
+            task_id, goal_id, task_db_data["title"], requirement_desc_form,
+            current_expected_modality, actual_submission_url_for_db, submission_text, upload,
+            owner_id=str(task_db_data["goal_user_id"])
+        )
+
+    try:
+        return await _verify_and_record_submission(
+            request, task_id, goal_id, task_db_data["title"], requirement_desc_form,
+            current_expected_modality, actual_submission_url_for_db, submission_text, upload
+        )
+    finally:
+        if upload:
+            upload.release()
+
+
+async def _enqueue_submission(
+    task_id: UUID,
+    goal_id: UUID,
+    task_title: str,
+    requirement_desc_form: str,
+    current_expected_modality: str,
+    actual_submission_url_for_db: str,
+    submission_text: Optional[str],
+    upload: Optional[IngestedUpload],
+    owner_id: str
+):
+    """Async mode: persist a pending submission and hand verification to the worker pool"""
+    pending_submission = SubmissionCreate(
+        task_id=task_id,
+        submitted_data_url=actual_submission_url_for_db,
+        verification_status=SubmissionStatusEnum.PENDING
+    )
+    try:
+        created_submission_data = await repository.record_submission(pending_submission.model_dump())
+    except Exception as e:
+        if upload:
+            upload.release()
+        print(f"Database submission encountered an error: {e}")
+        raise HTTPException(status_code=500, detail=f"Error creating submission in DB: {str(e)}")
+
+    submission_id = str(created_submission_data["id"])
+    handler = _make_verification_job_handler(
+        submission_id, task_id, goal_id, task_title, requirement_desc_form,
+        current_expected_modality, submission_text, upload
+    )
+    try:
+        verification_queue.enqueue(submission_id, handler, owner_id)
+    except QueueFullError:
+        if upload:
+            upload.release()
+        await repository.update_submission(submission_id, {
+            "verification_status": SubmissionStatusEnum.FAILED,
+            "verification_comments": "Verification queue is full"
+        })
+        raise HTTPException(status_code=503, detail="Verification queue is full. Please retry shortly.")
+
+    job = SubmissionJob(
+        job_id=submission_id,
+        status=SubmissionStatusEnum.PENDING,
+        submission=Submission(**created_submission_data)
+    )
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=job.model_dump(mode='json'),
+        headers={"Location": f"{router.prefix}/jobs/{submission_id}"}
+    )
+
+
+async def _verify_and_record_submission(
+    request: Request,
+    task_id: UUID,
+    goal_id: UUID,
+    task_title: str,
+    requirement_desc_form: str,
+    current_expected_modality: str,
+    actual_submission_url_for_db: str,
+    submission_text: Optional[str],
+    upload: Optional[IngestedUpload]
+):
+    """Sync mode: verify while the request waits, then record the submission"""
     # 2. Perform AI verification
-    verification_status_enum: SubmissionVerificationResultEnum # Type hint for clarity
+    is_verified: bool
     verification_comments: str = ""
     try:
-        ai_response_dict = await ai_verify_submission_content(
-            task=task_db_data["title"],
-            requirement=requirement_desc_form,
-            requirement_modality=current_expected_modality,
-            submission_text=submission_text,
-            submission_images=submission_images
+        is_verified, verification_comments = await cancel_on_disconnect(
+            request,
+            _run_ai_verification(
+                task_title,
+                requirement_desc_form,
+                current_expected_modality,
+                submission_text,
+                upload.images if upload else None
+            )
         )
-        
-        if not isinstance(ai_response_dict, dict) or "is_valid" not in ai_response_dict:
-            print(f"AI verification returned unexpected format: {ai_response_dict}")
-            raise HTTPException(status_code=500, detail="AI verification returned an invalid response format.")
-
-        if ai_response_dict.get("is_valid"):
-            verification_status_enum = SubmissionVerificationResultEnum.TRUE
-        else:
-            verification_status_enum = SubmissionVerificationResultEnum.FALSE
-        
-        # Extract comments from AI response
-        verification_comments = ai_response_dict.get("comments", "No comments provided")
 
     except HTTPException as e: 
         raise e
+    except asyncio.TimeoutError:
+        print(f"AI verification timed out for task {task_id}")
+        raise HTTPException(status_code=504, detail="AI verification timed out.")
     except Exception as e:
         print(f"AI verification encountered an error: {e}")
         raise HTTPException(status_code=500, detail=f"AI verification failed: {str(e)}")
@@ -123,7 +275,7 @@ async def submit_task(
     submission_to_create = SubmissionCreate(
         task_id=task_id,
         submitted_data_url=actual_submission_url_for_db,
-        verification_result=verification_status_enum.value, # Ensure .value is used here
+        verification_result=is_verified,
         verification_comments=verification_comments
     )
     
@@ -131,38 +283,94 @@ async def submit_task(
     print(f"Payload for submission: {submission_to_create.model_dump(mode='json')}") 
 
     try:
-        submission_response = supabase.table("submissions").insert(submission_to_create.model_dump(mode='json')).execute()
-        if not submission_response.data:
-            error_detail = "Unknown error"
-            if submission_response.error:
-                error_detail = submission_response.error.message
-            raise HTTPException(status_code=500, detail=f"Could not create submission: {error_detail}")
-        created_submission_data = submission_response.data[0]
+        created_submission_data = await repository.record_submission(submission_to_create.model_dump())
     except Exception as e:
         print(f"Database submission encountered an error: {e}")
         raise HTTPException(status_code=500, detail=f"Error creating submission in DB: {str(e)}")
 
-    # 4. If submission approved, update task status
-    if verification_status_enum == SubmissionVerificationResultEnum.TRUE: # Corrected enum member
-        try:
-            update_task_response = supabase.table("tasks").update({"verified": TaskVerifiedEnum.TRUE.value}).eq("id", str(task_id)).execute()
-            if not update_task_response.data:
-                print(f"Warning: Could not update task {task_id} to verified: {update_task_response.error.message if update_task_response.error else 'Unknown error'}")
-        except Exception as e:
-            print(f"Warning: Error updating task {task_id} status: {str(e)}")
-
-        # 5. Check if all tasks for the goal are completed
-        goal_id = task_db_data["goals"]["id"] 
-        all_tasks_for_goal_response = supabase.table("tasks").select("id, verified").eq("goal_id", str(goal_id)).execute()
-        
-        if all_tasks_for_goal_response.data:
-            all_verified = all(task['verified'] == TaskVerifiedEnum.TRUE.value for task in all_tasks_for_goal_response.data)
-            if all_verified:
-                try:
-                    update_goal_response = supabase.table("goals").update({"status": GoalStatusEnum.COMPLETED.value}).eq("id", str(goal_id)).execute()
-                    if not update_goal_response.data:
-                        print(f"Warning: Could not update goal {goal_id} to completed: {update_goal_response.error.message if update_goal_response.error else 'Unknown error'}")
-                except Exception as e:
-                    print(f"Warning: Error updating goal {goal_id} status: {str(e)}")
+    # 4. If submission approved, update task status and check goal completion
+    if is_verified:
+        await _apply_approved_submission(task_id, goal_id)
 
     return Submission(**created_submission_data)
+
+
+async def fail_stranded_verifications():
+    """Startup sweep: fail async-mode submissions whose job was lost with a previous process"""
+    try:
+        submission_ids = await repository.fail_stale_verifications(VERIFICATION_JOB_TIMEOUT_SECONDS, LOST_JOB_COMMENTS)
+    except Exception as e:
+        print(f"Error failing stranded verification jobs: {e}")
+        return
+    if submission_ids:
+        print(f"Marked {len(submission_ids)} stranded verification job(s) as failed.")
+
+
+async def _load_submission_job(job_id: UUID, user_id: str) -> SubmissionJob:
+    """Build job state from this worker's queue, falling back to the submissions table.
+
+    Jobs of other users are reported as not found.
+    """
+    job = verification_queue.get(str(job_id))
+    if job and job.owner_id == user_id:
+        if job.status == SubmissionStatusEnum.COMPLETED and job.result:
+            return SubmissionJob(job_id=job_id, status=job.status, submission=Submission(**job.result))
+        if job.status != SubmissionStatusEnum.COMPLETED:
+            return SubmissionJob(job_id=job_id, status=job.status, error=job.error)
+
+    try:
+        submission_data = await repository.get_submission_with_owner(job_id)
+        if (
+            submission_data and job is None
+            and SubmissionStatusEnum(submission_data["verification_status"]) not in TERMINAL_STATUSES
+            and await repository.fail_stale_verifications(VERIFICATION_JOB_TIMEOUT_SECONDS, LOST_JOB_COMMENTS, job_id)
+        ):
+            # Not queued here and past the timeout: its job was lost in a restart
+            submission_data = await repository.get_submission_with_owner(job_id)
+    except Exception as e:
+        print(f"Error fetching submission job {job_id}: {e}")
+        raise HTTPException(status_code=500, detail="Error retrieving submission job")
+    if not submission_data or str(submission_data["goal_user_id"]) != user_id:
+        raise HTTPException(status_code=404, detail="Submission job not found")
+
+    submission = Submission(**submission_data)
+    error = submission.verification_comments if submission.verification_status == SubmissionStatusEnum.FAILED else None
+    return SubmissionJob(job_id=job_id, status=submission.verification_status, submission=submission, error=error)
+
+
+@router.get("/jobs/{job_id}", response_model=SubmissionJob)
+async def get_submission_job(job_id: UUID, current_user: dict = Depends(get_current_user_dep)):
+    """Get the state of one of the caller's async-mode submission verifications"""
+    return await _load_submission_job(job_id, current_user["user_id"])
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_submission_job(job_id: UUID, request: Request, current_user: dict = Depends(get_current_user_dep)):
+    """Stream state changes of one of the caller's async-mode submissions as server-sent events"""
+    user_id = current_user["user_id"]
+    first = await _load_submission_job(job_id, user_id)
+
+    async def event_stream():
+        current = first
+        yield f"event: status\ndata: {current.model_dump_json()}\n\n"
+        while current.status not in TERMINAL_STATUSES:
+            job = verification_queue.get(str(job_id))
+            if job:
+                await job.wait_for_change(JOB_EVENTS_KEEPALIVE_SECONDS)
+            else:
+                # Job is owned by another worker process; poll the table instead
+                await asyncio.sleep(JOB_EVENTS_POLL_SECONDS)
+            if await request.is_disconnected():
+                return
+            latest = await _load_submission_job(job_id, user_id)
+            if latest.status != current.status:
+                yield f"event: status\ndata: {latest.model_dump_json()}\n\n"
+            else:
+                yield ": keep-alive\n\n"
+            current = latest
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
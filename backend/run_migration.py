@@ -1,85 +1,66 @@
 #!/usr/bin/env python3
 """
-Database migration script to add missing columns to goals table
-Run this script to update your database schema before running the cron job
+Apply pending database migrations from backend/migrations/
+
+Usage:
+    python run_migration.py           # apply pending migrations
+    python run_migration.py --status  # list applied and pending migrations
 """
 
+import asyncio
 import os
 import sys
-from pathlib import Path
+
+import asyncpg
 from dotenv import load_dotenv
-from supabase import create_client
+
+from services.migrations import apply_migrations, applied_versions, load_migrations
 
 # Load environment variables
 load_dotenv()
 
-def run_migration():
-    """Run the database migration"""
-    
-    # Get Supabase credentials
-    SUPABASE_URL = os.getenv("SUPABASE_URL")
-    SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-    
-    if not SUPABASE_URL or not SUPABASE_KEY:
-        print("❌ Error: SUPABASE_URL and SUPABASE_KEY must be set in .env file")
+
+async def show_status(conn):
+    applied = await applied_versions(conn)
+    for migration in load_migrations():
+        state = "applied" if migration.version in applied else "pending"
+        print(f"   {migration.version:04d}_{migration.name}: {state}")
+
+
+async def run_migration(status_only: bool = False):
+    """Run the database migrations"""
+    db_url = os.getenv("DATABASE_URL")
+    if not db_url:
+        print("❌ Error: DATABASE_URL must be set in .env file")
         sys.exit(1)
-    
-    # Create Supabase client
+
     try:
-        supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-        print("✅ Connected to Supabase")
+        conn = await asyncpg.connect(db_url)
+        print("✅ Connected to database")
     except Exception as e:
-        print(f"❌ Failed to connect to Supabase: {e}")
+        print(f"❌ Failed to connect to database: {e}")
         sys.exit(1)
-    
-    # Read migration SQL
-    migration_file = Path(__file__).parent / "migrations" / "add_goal_columns.sql"
-    
-    if not migration_file.exists():
-        print(f"❌ Migration file not found: {migration_file}")
+
+    try:
+        if status_only:
+            await show_status(conn)
+            return
+
+        applied = await apply_migrations(conn)
+        if applied:
+            print(f"\n🎉 Applied {len(applied)} migration(s):")
+            for migration in applied:
+                print(f"   • {migration.version:04d}_{migration.name}")
+        else:
+            print("\n✅ Database schema is already up to date")
+    except Exception as e:
+        print(f"💥 Migration failed: {e}")
         sys.exit(1)
-    
-    print(f"📖 Reading migration from: {migration_file}")
-    
-    with open(migration_file, 'r') as f:
-        migration_sql = f.read()
-    
-    # Split SQL into individual statements
-    statements = [stmt.strip() for stmt in migration_sql.split(';') if stmt.strip() and not stmt.strip().startswith('--')]
-    
-    print(f"🔄 Executing {len(statements)} SQL statements...")
-    
-    # Execute each statement
-    for i, statement in enumerate(statements, 1):
-        try:
-            print(f"   {i}. Executing: {statement[:50]}...")
-            
-            # Use rpc to execute raw SQL
-            result = supabase.rpc('exec_sql', {'sql': statement}).execute()
-            
-            print(f"   ✅ Statement {i} completed")
-            
-        except Exception as e:
-            print(f"   ❌ Error in statement {i}: {e}")
-            
-            # Check if it's a "column already exists" error - this is OK
-            if "already exists" in str(e).lower() or "duplicate" in str(e).lower():
-                print(f"   ℹ️  Column/table already exists - skipping")
-                continue
-            else:
-                print(f"   💥 Critical error - stopping migration")
-                sys.exit(1)
-    
-    print("\n🎉 Migration completed successfully!")
-    print("\n📋 Summary of changes:")
-    print("   • Added 'end_date' column to goals table (auto-calculated)")
-    print("   • Added 'settled_at' column to goals table")
-    print("   • Created 'settlement_transactions' table")
-    print("   • Added performance indexes")
-    
-    print("\n✅ Your database is now ready for the monthly settlement cron job!")
+    finally:
+        await conn.close()
+
 
 if __name__ == "__main__":
     print("🚀 Starting database migration...")
     print("=" * 50)
-    run_migration() 
\ No newline at end of file
+    asyncio.run(run_migration(status_only="--status" in sys.argv))
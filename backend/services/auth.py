@@ -1,53 +1,71 @@
 import os
 import secrets
 import hashlib
+import time
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
+from uuid import UUID
 from jose import JWTError, jwt
 from fastapi import HTTPException, status
 import xrpl
-from xrpl.utils import str_to_hex
 from xrpl.wallet import Wallet
 from xrpl.models.requests import AccountInfo
 from xrpl.models.response import Response
 
+from services.challenge_store import ChallengeStore, create_challenge_store, AUTH_CHALLENGE_TTL_SECONDS
+from services.lru_cache import TTLLRUCache
+from services.revocation import TokenRevocationList, token_expiry, token_revocations
+from services.signature_verifier import SignatureVerifier, signature_verifier
+
 # JWT Configuration
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", secrets.token_urlsafe(32))
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
 
+# Verified tokens, keyed by token hash; each entry expires with its token
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+# User rows for /auth/me; dropped on login, so only other workers can serve a stale last_login
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+
 class AuthService:
-    def __init__(self):
-        self.challenges: Dict[str, Dict[str, Any]] = {}  # In production, use Redis
+    def __init__(
+        self,
+        challenges: Optional[ChallengeStore] = None,
+        revocations: TokenRevocationList = token_revocations,
+        signatures: SignatureVerifier = signature_verifier,
+    ):
+        # Shared (Redis) when REDIS_URL is set, so any worker can redeem a challenge
+        self.challenges = challenges or create_challenge_store()
+        self.revocations = revocations
+        self.signatures = signatures
+        self.token_cache = TTLLRUCache(TOKEN_CACHE_MAX_ENTRIES, ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+        self.user_cache = TTLLRUCache(USER_CACHE_MAX_ENTRIES, USER_CACHE_TTL_SECONDS)
         
-    def generate_challenge(self, wallet_address: str) -> str:
+    async def generate_challenge(self, wallet_address: str) -> str:
         """Generate a unique challenge for wallet authentication"""
         challenge = secrets.token_urlsafe(32)
         timestamp = datetime.utcnow()
         
-        # Store challenge with expiration (5 minutes)
-        self.challenges[wallet_address] = {
-            "challenge": challenge,
-            "timestamp": timestamp,
-            "expires_at": timestamp + timedelta(minutes=5)
-        }
+        # Store challenge with expiration (AUTH_CHALLENGE_TTL_SECONDS, 5 minutes by default)
+        await self.challenges.put(wallet_address, challenge, AUTH_CHALLENGE_TTL_SECONDS)
         
         # Create the message to be signed
         message = f"Sign this message to authenticate with Ripple Goals:\n\nChallenge: {challenge}\nWallet: {wallet_address}\nTimestamp: {timestamp.isoformat()}"
         return message
     
-    def verify_signature(self, wallet_address: str, signature: str, challenge: str, xaman_payload_uuid: str = None, xumm_sdk_auth: bool = False) -> bool:
-        """Verify the wallet signature against the challenge"""
+    async def verify_signature(self, wallet_address: str, signature: str, challenge: str, xaman_payload_uuid: str = None, xumm_sdk_auth: bool = False, public_key: Optional[str] = None) -> bool:
+        """Verify the wallet signature against the challenge.
+
+        The stored challenge is taken atomically, so each one can be tried only once,
+        whether or not verification succeeds.
+        """
         try:
-            # Check if challenge exists and is valid
-            if wallet_address not in self.challenges:
-                return False
-                
-            stored_challenge = self.challenges[wallet_address]
-            
-            # Check challenge match and expiration
-            if (stored_challenge["challenge"] != challenge.split("Challenge: ")[1].split("\n")[0] or
-                datetime.utcnow() > stored_challenge["expires_at"]):
+            submitted_challenge = challenge.split("Challenge: ")[1].split("\n")[0]
+
+            # Take the challenge; None if it was never issued, already used or expired
+            stored_challenge = await self.challenges.pop(wallet_address)
+            if stored_challenge is None or stored_challenge != submitted_challenge:
                 return False
             
             # Special handling for Xumm Universal SDK authentication
@@ -56,9 +74,6 @@ class AuthService:
                 # through the Xumm app's secure OAuth2/JWT authentication flow
                 # The SDK handles the cryptographic verification on the client side
                 print(f"Xumm Universal SDK auth successful for wallet: {wallet_address}")
-                
-                # Remove used challenge
-                del self.challenges[wallet_address]
                 return True
             
             # Legacy handling for Xaman authentication
@@ -67,26 +82,13 @@ class AuthService:
                 # signed the SignIn payload through the Xaman platform
                 # The wallet address is already verified by Xaman
                 print(f"Xaman auth successful for wallet: {wallet_address}, payload: {xaman_payload_uuid}")
-                
-                # Remove used challenge
-                del self.challenges[wallet_address]
                 return True
             
-            # For XRP Ledger signature verification
-            # Note: This is a simplified version. In production, you'd want to use
-            # proper XRPL signature verification methods
-            
-            # Convert the challenge message to hex for verification
-            message_hex = str_to_hex(challenge)
-            
-            # Here you would implement proper XRPL signature verification
-            # For now, we'll do a basic validation that the signature exists and has proper format
-            if len(signature) < 64:  # Basic signature length check
+            # Direct XRPL signature over the challenge message: the public key must derive
+            # to the wallet address and the signature must verify (in the process pool)
+            if not public_key:
                 return False
-                
-            # Remove used challenge
-            del self.challenges[wallet_address]
-            return True
+            return await self.signatures.verify(wallet_address, challenge, signature, public_key)
             
         except Exception as e:
             print(f"Signature verification error: {e}")
@@ -100,6 +102,7 @@ class AuthService:
             "user_id": user_id,
             "exp": expire,
             "iat": datetime.utcnow(),
+            "jti": secrets.token_hex(16),  # lets /auth/logout revoke this token alone
             "type": "access"
         }
         
@@ -112,7 +115,12 @@ class AuthService:
         }
     
     def verify_token(self, token: str) -> Dict[str, Any]:
-        """Verify and decode JWT token"""
+        """Verify and decode JWT token; tokens seen before are answered from the token cache"""
+        cache_key = hashlib.sha256(token.encode()).digest()
+        claims = self.token_cache.get(cache_key)
+        if claims is not None:
+            return dict(claims)
+
         try:
             payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
             wallet_address: str = payload.get("sub")
@@ -125,10 +133,18 @@ class AuthService:
                     headers={"WWW-Authenticate": "Bearer"},
                 )
                 
-            return {
+            claims = {
                 "wallet_address": wallet_address,
-                "user_id": user_id
+                "user_id": user_id,
+                # Tokens issued before jti was added are identified by their hash instead
+                "jti": payload.get("jti") or cache_key.hex(),
+                "exp": payload.get("exp"),
             }
+            # Cache until the token itself expires, never longer
+            ttl = payload.get("exp", 0) - time.time()
+            if ttl > 0:
+                self.token_cache.set(cache_key, claims, ttl)
+            return dict(claims)
             
         except JWTError:
             raise HTTPException(
@@ -137,6 +153,39 @@ class AuthService:
                 headers={"WWW-Authenticate": "Bearer"},
             )
     
+    async def authenticate(self, token: str) -> Dict[str, Any]:
+        """verify_token plus the revocation check; what protected routes should call"""
+        claims = self.verify_token(token)
+        if await self.revocations.is_revoked(claims["jti"]):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token has been revoked",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return claims
+
+    async def revoke_token(self, claims: Dict[str, Any]):
+        """Deny this token on every worker until it would have expired anyway"""
+        await self.revocations.revoke(claims["jti"], token_expiry(claims["exp"]), user_id=UUID(claims["user_id"]))
+
+    def get_cached_user(self, user_id: str) -> Optional[Any]:
+        return self.user_cache.get(user_id)
+
+    def cache_user(self, user_id: str, user: Any):
+        self.user_cache.set(user_id, user)
+
+    def invalidate_user(self, user_id: str):
+        self.user_cache.delete(user_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "challenges": self.challenges.stats(),
+            "token_cache": self.token_cache.stats(),
+            "user_cache": self.user_cache.stats(),
+            "revocations": self.revocations.stats(),
+            "signatures": self.signatures.stats(),
+        }
+    
     def validate_xrp_address(self, address: str) -> bool:
         """Validate if the provided string is a valid XRP address"""
         try:
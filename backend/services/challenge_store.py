@@ -0,0 +1,119 @@
+import heapq
+from abc import ABC, abstractmethod
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from services.redis_client import get_redis
+
+AUTH_CHALLENGE_TTL_SECONDS = int(os.getenv("AUTH_CHALLENGE_TTL_SECONDS", "300"))
+# In-memory store only: beyond this many outstanding challenges the ones closest to expiry go first
+AUTH_CHALLENGE_MAX_ENTRIES = int(os.getenv("AUTH_CHALLENGE_MAX_ENTRIES", "100000"))
+
+_REDIS_KEY_PREFIX = "auth_challenge:"
+
+
+class ChallengeStore(ABC):
+    """Outstanding wallet-auth challenges, one per wallet address.
+
+    put() replaces any earlier challenge for the wallet; pop() atomically takes the
+    challenge (None if missing or expired), so each challenge can be redeemed once.
+    """
+
+    name = "store"
+
+    @abstractmethod
+    async def put(self, wallet_address: str, challenge: str, ttl_seconds: int = AUTH_CHALLENGE_TTL_SECONDS):
+        ...
+
+    @abstractmethod
+    async def pop(self, wallet_address: str) -> Optional[str]:
+        ...
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name}
+
+
+class InMemoryChallengeStore(ChallengeStore):
+    """Per-process store; expired challenges are evicted from a min-heap of expiry times.
+
+    Only suitable for a single worker: a challenge issued by one process can't be
+    redeemed on another.
+    """
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = AUTH_CHALLENGE_MAX_ENTRIES, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self._clock = clock
+        self._challenges: Dict[str, Tuple[str, float]] = {}  # wallet -> (challenge, expires_at)
+        # (expires_at, wallet); entries left behind by replaced or redeemed challenges are
+        # skipped when they reach the top
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self.expired = 0
+        self.evicted = 0
+
+    def _purge(self):
+        now = self._clock()
+        heap = self._expiry_heap
+        while heap and (heap[0][0] <= now or len(self._challenges) > self.max_entries):
+            expires_at, wallet_address = heapq.heappop(heap)
+            current = self._challenges.get(wallet_address)
+            if current is None or current[1] != expires_at:
+                continue
+            del self._challenges[wallet_address]
+            if expires_at <= now:
+                self.expired += 1
+            else:
+                self.evicted += 1
+        if len(heap) > 2 * len(self._challenges) + 1024:
+            # Too many stale entries from replaced challenges; rebuild from the live ones
+            self._expiry_heap = [(expires_at, wallet) for wallet, (_, expires_at) in self._challenges.items()]
+            heapq.heapify(self._expiry_heap)
+
+    async def put(self, wallet_address: str, challenge: str, ttl_seconds: int = AUTH_CHALLENGE_TTL_SECONDS):
+        expires_at = self._clock() + ttl_seconds
+        self._challenges[wallet_address] = (challenge, expires_at)
+        heapq.heappush(self._expiry_heap, (expires_at, wallet_address))
+        self._purge()
+
+    async def pop(self, wallet_address: str) -> Optional[str]:
+        self._purge()
+        entry = self._challenges.pop(wallet_address, None)
+        return entry[0] if entry else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "entries": len(self._challenges),
+            "max_entries": self.max_entries,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
+
+
+class RedisChallengeStore(ChallengeStore):
+    """Store shared by every worker, on any server speaking the Redis protocol (6.2+ for GETDEL).
+
+    Redis expires the keys itself, and GETDEL makes redemption atomic across workers.
+    """
+
+    name = "redis"
+
+    def __init__(self, redis):
+        self.redis = redis
+
+    async def put(self, wallet_address: str, challenge: str, ttl_seconds: int = AUTH_CHALLENGE_TTL_SECONDS):
+        await self.redis.set(_REDIS_KEY_PREFIX + wallet_address, challenge, ex=ttl_seconds)
+
+    async def pop(self, wallet_address: str) -> Optional[str]:
+        challenge = await self.redis.getdel(_REDIS_KEY_PREFIX + wallet_address)
+        return challenge.decode() if isinstance(challenge, bytes) else challenge
+
+
+def create_challenge_store() -> ChallengeStore:
+    """Redis-backed when REDIS_URL is configured (required with several workers), in-memory otherwise"""
+    redis = get_redis()
+    if redis is not None:
+        return RedisChallengeStore(redis)
+    return InMemoryChallengeStore()
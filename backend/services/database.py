@@ -0,0 +1,131 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+import asyncpg
+
+# Pool sizing is per API worker process
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_ACQUIRE_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT_SECONDS", "10"))
+DB_POOL_MAX_INACTIVE_SECONDS = float(os.getenv("DB_POOL_MAX_INACTIVE_SECONDS", "300"))
+# Prepared statements cached per connection; set to 0 behind pgbouncer in transaction mode
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+DB_COMMAND_TIMEOUT_SECONDS = float(os.getenv("DB_COMMAND_TIMEOUT_SECONDS", "30"))
+# Connections idle for longer than this are pinged before being handed out
+DB_HEALTH_CHECK_IDLE_SECONDS = float(os.getenv("DB_HEALTH_CHECK_IDLE_SECONDS", "30"))
+
+
+class Database:
+    """Process-wide asyncpg pool with idle-connection health checks and wait-time counters"""
+
+    def __init__(
+        self,
+        min_size: int = DB_POOL_MIN_SIZE,
+        max_size: int = DB_POOL_MAX_SIZE,
+        acquire_timeout: float = DB_POOL_ACQUIRE_TIMEOUT_SECONDS,
+        health_check_idle_seconds: float = DB_HEALTH_CHECK_IDLE_SECONDS,
+    ):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.health_check_idle_seconds = health_check_idle_seconds
+        self.pool: Optional[asyncpg.Pool] = None
+        self._last_used: Dict[int, float] = {}  # backend pid -> monotonic time of last release
+        self.acquisitions = 0
+        self.acquire_timeouts = 0
+        self.health_check_failures = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    @property
+    def is_connected(self) -> bool:
+        return self.pool is not None
+
+    async def connect(self, dsn: str):
+        """Create the pool; raises the underlying asyncpg error if Postgres is unreachable"""
+        self.pool = await asyncpg.create_pool(
+            dsn,
+            min_size=self.min_size,
+            max_size=self.max_size,
+            max_inactive_connection_lifetime=DB_POOL_MAX_INACTIVE_SECONDS,
+            statement_cache_size=DB_STATEMENT_CACHE_SIZE,
+            command_timeout=DB_COMMAND_TIMEOUT_SECONDS,
+        )
+
+    async def close(self):
+        if self.pool is not None:
+            pool, self.pool = self.pool, None
+            await pool.close()
+            self._last_used.clear()
+
+    async def _is_healthy(self, conn) -> bool:
+        last_used = self._last_used.get(conn.get_server_pid())
+        if last_used is None or time.monotonic() - last_used < self.health_check_idle_seconds:
+            return True
+        try:
+            await conn.execute("SELECT 1", timeout=self.acquire_timeout)
+            return True
+        except Exception as e:
+            self.health_check_failures += 1
+            print(f"Discarding unhealthy database connection: {e}")
+            return False
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[asyncpg.Connection]:
+        """Borrow a connection from the pool.
+
+        Raises RuntimeError if the pool was never created and asyncio.TimeoutError if
+        no connection frees up within DB_POOL_ACQUIRE_TIMEOUT_SECONDS.
+        """
+        if self.pool is None:
+            raise RuntimeError("Database pool is not initialized")
+
+        started = time.perf_counter()
+        try:
+            conn = await self.pool.acquire(timeout=self.acquire_timeout)
+            if not await self._is_healthy(conn):
+                # The pool replaces terminated connections on release
+                self._last_used.pop(conn.get_server_pid(), None)
+                conn.terminate()
+                await self.pool.release(conn)
+                conn = await self.pool.acquire(timeout=self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self.acquire_timeouts += 1
+            raise
+        waited = time.perf_counter() - started
+        self.acquisitions += 1
+        self.wait_seconds_total += waited
+        self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+        try:
+            yield conn
+        finally:
+            if not conn.is_closed():
+                if len(self._last_used) > 4 * self.max_size:
+                    # Drop pids of connections the pool has since recycled
+                    self._last_used.clear()
+                self._last_used[conn.get_server_pid()] = time.monotonic()
+            await self.pool.release(conn)
+
+    def stats(self) -> Dict[str, Any]:
+        pool = self.pool
+        return {
+            "connected": pool is not None,
+            "size": pool.get_size() if pool else 0,
+            "idle": pool.get_idle_size() if pool else 0,
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "acquisitions": self.acquisitions,
+            "acquire_timeouts": self.acquire_timeouts,
+            "health_check_failures": self.health_check_failures,
+            "wait_ms_avg": round(self.wait_seconds_total / self.acquisitions * 1000, 3) if self.acquisitions else None,
+            "wait_ms_max": round(self.wait_seconds_max * 1000, 3),
+        }
+
+
+# Global pool, opened and closed by the application lifespan
+database = Database()
+
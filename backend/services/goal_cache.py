@@ -0,0 +1,164 @@
+import hashlib
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional
+
+from fastapi import Request, Response
+
+from services.lru_cache import TTLLRUCache
+from services.redis_client import get_redis
+from services.serialization import dumps
+
+GOAL_CACHE_MAX_GOALS = int(os.getenv("GOAL_CACHE_MAX_GOALS", "4096"))
+# The in-process tier is only invalidated on the worker that made the write, so its TTL
+# bounds how stale another worker's copy can be
+GOAL_CACHE_TTL_SECONDS = float(os.getenv("GOAL_CACHE_TTL_SECONDS", "5"))
+# The Redis tier is invalidated explicitly by every worker; the TTL only bounds memory use
+GOAL_CACHE_SHARED_TTL_SECONDS = int(os.getenv("GOAL_CACHE_SHARED_TTL_SECONDS", "60"))
+
+_SHARED_KEY_PREFIX = "goal_cache:"
+# How long an invalidation is remembered, i.e. the longest a load can race it
+_INVALIDATION_WINDOW_SECONDS = 60
+
+
+class CachedResponse(NamedTuple):
+    etag: str
+    body: bytes
+    expires_at: float  # time.monotonic() deadline for the in-process copy
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+class GoalCache:
+    """Read-through cache for polled goal reads (goal status, a goal's task list).
+
+    Entries are JSON response bodies grouped per goal, so one invalidation drops every
+    view of a goal (each user's status, the task list). An in-process TTL tier sits in
+    front of an optional Redis hash per goal shared by all workers.
+    """
+
+    def __init__(self):
+        self.memory = TTLLRUCache(GOAL_CACHE_MAX_GOALS, GOAL_CACHE_TTL_SECONDS)
+        self._invalidated_at = TTLLRUCache(GOAL_CACHE_MAX_GOALS, _INVALIDATION_WINDOW_SECONDS)
+        self.memory_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.shared_errors = 0
+
+    async def get_or_load(
+        self,
+        goal_id,
+        view: str,
+        loader: Callable[[], Awaitable[Optional[Any]]],
+    ) -> Optional[CachedResponse]:
+        """Return the cached body for this view of a goal, calling loader() on a miss.
+
+        loader returns a payload for serialization.dumps, or None (e.g. not found), which is
+        passed through and not cached.
+        """
+        goal_key = str(goal_id)
+        views: Dict[str, CachedResponse] = self.memory.get(goal_key) or {}
+        cached = views.get(view)
+        if cached is not None and cached.expires_at > time.monotonic():
+            self.memory_hits += 1
+            return cached
+
+        cached = await self._shared_get(goal_key, view)
+        if cached is not None:
+            self.shared_hits += 1
+            self._remember(goal_key, view, cached)
+            return cached
+
+        self.misses += 1
+        load_started = time.monotonic()
+        payload = await loader()
+        if payload is None:
+            return None
+        body = dumps(payload)
+        cached = CachedResponse(_etag(body), body, time.monotonic() + GOAL_CACHE_TTL_SECONDS)
+        invalidated_at = self._invalidated_at.get(goal_key)
+        if invalidated_at is not None and invalidated_at >= load_started:
+            # A write landed while we were loading; serve this once but don't cache it
+            return cached
+        self._remember(goal_key, view, cached)
+        await self._shared_set(goal_key, view, cached)
+        return cached
+
+    async def invalidate(self, goal_id):
+        """Drop every cached view of a goal, here and in the shared tier"""
+        goal_key = str(goal_id)
+        self.invalidations += 1
+        self.memory.delete(goal_key)
+        self._invalidated_at.set(goal_key, time.monotonic())
+        redis = get_redis()
+        if redis is None:
+            return
+        try:
+            await redis.delete(_SHARED_KEY_PREFIX + goal_key)
+        except Exception as e:
+            self.shared_errors += 1
+            print(f"Goal cache invalidation failed for goal {goal_key}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.shared_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "shared_errors": self.shared_errors,
+            "shared_tier": get_redis() is not None,
+            "hit_ratio": round((self.memory_hits + self.shared_hits) / lookups, 4) if lookups else None,
+            "memory": self.memory.stats(),
+        }
+
+    def _remember(self, goal_key: str, view: str, cached: CachedResponse):
+        views = dict(self.memory.get(goal_key) or {})
+        views[view] = cached._replace(expires_at=time.monotonic() + GOAL_CACHE_TTL_SECONDS)
+        self.memory.set(goal_key, views)
+
+    async def _shared_get(self, goal_key: str, view: str) -> Optional[CachedResponse]:
+        redis = get_redis()
+        if redis is None:
+            return None
+        try:
+            raw = await redis.hget(_SHARED_KEY_PREFIX + goal_key, view)
+        except Exception as e:
+            self.shared_errors += 1
+            print(f"Goal cache read failed for goal {goal_key}: {e}")
+            return None
+        if raw is None:
+            return None
+        # Stored as "<etag> <body>"; the etag never contains a space
+        etag, body = raw.split(b" ", 1)
+        return CachedResponse(etag.decode(), body, 0.0)
+
+    async def _shared_set(self, goal_key: str, view: str, cached: CachedResponse):
+        redis = get_redis()
+        if redis is None:
+            return
+        key = _SHARED_KEY_PREFIX + goal_key
+        try:
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.hset(key, view, cached.etag.encode() + b" " + cached.body)
+                pipe.expire(key, GOAL_CACHE_SHARED_TTL_SECONDS)
+                await pipe.execute()
+        except Exception as e:
+            self.shared_errors += 1
+            print(f"Goal cache write failed for goal {goal_key}: {e}")
+
+
+def etag_response(request: Request, cached: CachedResponse) -> Response:
+    """200 with the cached JSON body, or 304 with no body if the client already has it"""
+    headers = {"ETag": cached.etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and cached.etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+
+# Global goal read cache
+goal_cache = GoalCache()
@@ -0,0 +1,103 @@
+import hashlib
+import re
+from pathlib import Path
+from typing import List, NamedTuple
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "migrations"
+# Arbitrary constant shared by every process that runs migrations
+MIGRATIONS_LOCK_ID = 72_657_300_001
+
+_MIGRATION_FILE_RE = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+CREATE_SCHEMA_MIGRATIONS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    checksum TEXT NOT NULL,
+    applied_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    sql: str
+    checksum: str
+
+
+def load_migrations(directory: Path = MIGRATIONS_DIR) -> List[Migration]:
+    """Read NNNN_name.sql files from the migrations directory, ordered by version"""
+    migrations = []
+    for path in directory.glob("*.sql"):
+        match = _MIGRATION_FILE_RE.match(path.name)
+        if not match:
+            print(f"Warning: Ignoring migration file with unexpected name: {path.name}")
+            continue
+        sql = path.read_text()
+        migrations.append(Migration(
+            version=int(match.group(1)),
+            name=match.group(2),
+            sql=sql,
+            checksum=hashlib.sha256(sql.encode()).hexdigest(),
+        ))
+    migrations.sort(key=lambda migration: migration.version)
+
+    versions = [migration.version for migration in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f"Duplicate migration versions in {directory}")
+    return migrations
+
+
+def latest_version(directory: Path = MIGRATIONS_DIR) -> int:
+    migrations = load_migrations(directory)
+    return migrations[-1].version if migrations else 0
+
+
+async def applied_versions(conn) -> dict:
+    """version -> checksum of every applied migration ({} if the runner never ran)"""
+    exists = await conn.fetchval("SELECT to_regclass('schema_migrations') IS NOT NULL")
+    if not exists:
+        return {}
+    rows = await conn.fetch("SELECT version, checksum FROM schema_migrations")
+    return {row["version"]: row["checksum"] for row in rows}
+
+
+async def current_schema_version(conn) -> int:
+    """Highest applied migration version (0 if the runner never ran); cheap enough for every boot"""
+    exists = await conn.fetchval("SELECT to_regclass('schema_migrations') IS NOT NULL")
+    if not exists:
+        return 0
+    return await conn.fetchval("SELECT COALESCE(max(version), 0) FROM schema_migrations")
+
+
+async def apply_migrations(conn, directory: Path = MIGRATIONS_DIR) -> List[Migration]:
+    """Apply pending migrations in order and return the ones applied.
+
+    Holds a Postgres advisory lock for the duration, so concurrent callers (several
+    workers or deploys) wait and then find nothing left to do. Each migration runs in
+    its own transaction together with its schema_migrations row.
+    """
+    migrations = load_migrations(directory)
+    await conn.execute("SELECT pg_advisory_lock($1)", MIGRATIONS_LOCK_ID)
+    try:
+        await conn.execute(CREATE_SCHEMA_MIGRATIONS_TABLE_SQL)
+        applied = await applied_versions(conn)
+
+        newly_applied = []
+        for migration in migrations:
+            if migration.version in applied:
+                if applied[migration.version] != migration.checksum:
+                    print(f"Warning: Migration {migration.version}_{migration.name} changed after it was applied")
+                continue
+            print(f"Applying migration {migration.version}_{migration.name}...")
+            async with conn.transaction():
+                await conn.execute(migration.sql)
+                await conn.execute(
+                    "INSERT INTO schema_migrations (version, name, checksum) VALUES ($1, $2, $3)",
+                    migration.version, migration.name, migration.checksum
+                )
+            newly_applied.append(migration)
+        return newly_applied
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock($1)", MIGRATIONS_LOCK_ID)
@@ -0,0 +1,30 @@
+import os
+from typing import Optional
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # optional dependency: pip install redis
+    redis_asyncio = None
+
+# Shared Redis used as a cross-worker tier by in-process caches; unset to run without it
+REDIS_URL = os.getenv("REDIS_URL")
+
+if REDIS_URL and redis_asyncio is None:
+    print("Warning: REDIS_URL is set but the redis package is not installed; running without Redis")
+
+_client = None
+
+
+def get_redis() -> Optional["redis_asyncio.Redis"]:
+    """The process-wide Redis client, or None when REDIS_URL is unset or redis isn't installed"""
+    global _client
+    if _client is None and REDIS_URL and redis_asyncio is not None:
+        _client = redis_asyncio.from_url(REDIS_URL)
+    return _client
+
+
+async def close_redis():
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.aclose()
@@ -0,0 +1,441 @@
+import json
+from datetime import date, datetime, timezone
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from models import GoalStatusEnum, PlanStatusEnum
+from services.database import Database, database
+from services.goal_cache import GoalCache, goal_cache
+
+# Column order used by the unnest()-based bulk task insert
+TASK_INSERT_COLUMNS = ["goal_id", "week_number", "title", "verification_method", "expected_data_type", "verified"]
+TASK_INSERT_TYPES = ["uuid[]", "int[]", "text[]", "text[]", "text[]", "bool[]"]
+
+
+def _db_value(value: Any) -> Any:
+    """Convert model_dump() (python mode) values into what asyncpg expects"""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime) and value.tzinfo is None:
+        # Naive timestamps in the models are UTC (datetime.utcnow)
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _row(record) -> Optional[Dict[str, Any]]:
+    return dict(record) if record is not None else None
+
+
+def _as_uuid(value) -> UUID:
+    return value if isinstance(value, UUID) else UUID(str(value))
+
+
+class Repository:
+    """Async data access for goals, tasks and submissions on the shared asyncpg pool.
+
+    Every method borrows a pooled connection for the duration of its statements, so
+    queries never block the event loop and rows come back as plain dicts. Writes to an
+    existing goal or its tasks invalidate that goal's cached reads once committed.
+    """
+
+    def __init__(self, db: Database = database, cache: GoalCache = goal_cache):
+        self.db = db
+        self.cache = cache
+
+    async def _insert(self, conn, table: str, values: Dict[str, Any]) -> Dict[str, Any]:
+        columns = list(values)
+        placeholders = ", ".join(f"${i}" for i in range(1, len(columns) + 1))
+        record = await conn.fetchrow(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) RETURNING *",
+            *[_db_value(values[column]) for column in columns]
+        )
+        return dict(record)
+
+    async def _update(self, conn, table: str, row_id, values: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        columns = list(values)
+        assignments = ", ".join(f"{column} = ${i}" for i, column in enumerate(columns, start=2))
+        record = await conn.fetchrow(
+            f"UPDATE {table} SET {assignments} WHERE id = $1 RETURNING *",
+            _as_uuid(row_id), *[_db_value(values[column]) for column in columns]
+        )
+        return _row(record)
+
+    # --- Users ---
+
+    async def upsert_user_login(self, wallet_address: str) -> UUID:
+        """Create the user on first login or bump last_login, in one statement; returns the user id.
+
+        ON CONFLICT makes concurrent first logins for the same wallet converge on one row
+        instead of racing into a unique violation.
+        """
+        async with self.db.acquire() as conn:
+            return await conn.fetchval(
+                """INSERT INTO users (wallet_address, created_at, last_login)
+                   VALUES ($1, now(), now())
+                   ON CONFLICT (wallet_address) DO UPDATE SET last_login = EXCLUDED.last_login
+                   RETURNING id""",
+                wallet_address
+            )
+
+    async def get_user(self, user_id) -> Optional[Dict[str, Any]]:
+        async with self.db.acquire() as conn:
+            record = await conn.fetchrow(
+                "SELECT id, wallet_address, created_at, last_login FROM users WHERE id = $1",
+                _as_uuid(user_id)
+            )
+            return _row(record)
+
+    # --- Goals ---
+
+    async def insert_goal(self, goal: Dict[str, Any]) -> Dict[str, Any]:
+        async with self.db.acquire() as conn:
+            return await self._insert(conn, "goals", goal)
+
+    async def get_goal(self, goal_id, user_id=None) -> Optional[Dict[str, Any]]:
+        """A goal by id, optionally only if it belongs to user_id"""
+        async with self.db.acquire() as conn:
+            if user_id is None:
+                record = await conn.fetchrow("SELECT * FROM goals WHERE id = $1", _as_uuid(goal_id))
+            else:
+                record = await conn.fetchrow(
+                    "SELECT * FROM goals WHERE id = $1 AND user_id = $2",
+                    _as_uuid(goal_id), _as_uuid(user_id)
+                )
+            return _row(record)
+
+    async def get_goal_with_tasks(self, goal_id, user_id) -> Optional[Dict[str, Any]]:
+        """A user's goal with its tasks (ordered by week) under "tasks", or None"""
+        async with self.db.acquire() as conn:
+            goal = await conn.fetchrow(
+                "SELECT * FROM goals WHERE id = $1 AND user_id = $2",
+                _as_uuid(goal_id), _as_uuid(user_id)
+            )
+            if goal is None:
+                return None
+            tasks = await conn.fetch(
+                "SELECT * FROM tasks WHERE goal_id = $1 ORDER BY week_number",
+                goal["id"]
+            )
+            return {**dict(goal), "tasks": [dict(task) for task in tasks]}
+
+    async def list_goals(
+        self,
+        user_id,
+        limit: int,
+        statuses: Optional[List[GoalStatusEnum]] = None,
+        after: Optional[Tuple[date, UUID]] = None,
+    ) -> List[Dict[str, Any]]:
+        """A page of a user's goals, newest start_date first, each with per-week task counts.
+
+        Keyset pagination: `after` is the (start_date, id) of the last goal on the previous
+        page, so every page is an index range scan however many goals came before it.
+        """
+        conditions = ["g.user_id = $1"]
+        args: List[Any] = [_as_uuid(user_id)]
+        if statuses:
+            args.append([_db_value(goal_status) for goal_status in statuses])
+            conditions.append(f"g.status = ANY(${len(args)}::goal_status[])")
+        if after is not None:
+            args.extend([after[0], _as_uuid(after[1])])
+            conditions.append(f"(g.start_date, g.id) < (${len(args) - 1}::date, ${len(args)}::uuid)")
+        args.append(limit)
+
+        async with self.db.acquire() as conn:
+            records = await conn.fetch(
+                f"""SELECT g.*, COALESCE(w.weeks, '[]'::json) AS weeks
+                    FROM goals g
+                    LEFT JOIN LATERAL (
+                        SELECT json_agg(json_build_object(
+                                   'week_number', week_number, 'total', total, 'verified', verified
+                               ) ORDER BY week_number) AS weeks
+                        FROM (
+                            SELECT week_number, count(*) AS total, count(*) FILTER (WHERE verified) AS verified
+                            FROM tasks
+                            WHERE goal_id = g.id
+                            GROUP BY week_number
+                        ) per_week
+                    ) w ON true
+                    WHERE {' AND '.join(conditions)}
+                    ORDER BY g.start_date DESC, g.id DESC
+                    LIMIT ${len(args)}""",
+                *args
+            )
+        goals = []
+        for record in records:
+            goal = dict(record)
+            goal["weeks"] = json.loads(goal["weeks"])
+            goals.append(goal)
+        return goals
+
+    async def update_goal(self, goal_id, values: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        async with self.db.acquire() as conn:
+            goal = await self._update(conn, "goals", goal_id, values)
+        await self.cache.invalidate(goal_id)
+        return goal
+
+    async def set_plan_status(self, goal_id, plan_status: PlanStatusEnum) -> Optional[Dict[str, Any]]:
+        """Set a goal's plan_status and return its row.
+
+        Goals only complete once their plan is ready, so marking a streamed plan ready also
+        completes the goal if every task was already approved while weeks were still arriving.
+        """
+        async with self.db.acquire() as conn:
+            goal = _row(await conn.fetchrow(
+                """UPDATE goals
+                   SET plan_status = $2,
+                       status = CASE
+                           WHEN $2 = $3 AND status = $4::goal_status AND total_tasks > 0 AND verified_tasks >= total_tasks
+                               THEN $5::goal_status
+                           ELSE status
+                       END
+                   WHERE id = $1
+                   RETURNING *""",
+                _as_uuid(goal_id), _db_value(plan_status), PlanStatusEnum.READY.value,
+                GoalStatusEnum.INCOMPLETE.value, GoalStatusEnum.COMPLETED.value
+            ))
+        await self.cache.invalidate(goal_id)
+        return goal
+
+    async def restart_plan_generation(self, goal_id, user_id, stale_after_seconds: float) -> Optional[Dict[str, Any]]:
+        """Atomically move a goal whose plan failed, or whose generation has been running for
+        longer than stale_after_seconds, back to 'generating'; None if it isn't retryable
+        """
+        async with self.db.acquire() as conn:
+            goal = _row(await conn.fetchrow(
+                """UPDATE goals SET plan_status = 'generating', plan_requested_at = now()
+                   WHERE id = $1 AND user_id = $2
+                     AND (plan_status = 'failed'
+                          OR (plan_status = 'generating'
+                              AND (plan_requested_at IS NULL OR plan_requested_at < now() - make_interval(secs => $3))))
+                   RETURNING *""",
+                _as_uuid(goal_id), _as_uuid(user_id), stale_after_seconds
+            ))
+        if goal is not None:
+            await self.cache.invalidate(goal_id)
+        return goal
+
+    async def fail_stale_plan_generations(self, stale_after_seconds: float) -> List[UUID]:
+        """Mark goals stuck in 'generating' for longer than stale_after_seconds as failed; returns their ids"""
+        async with self.db.acquire() as conn:
+            records = await conn.fetch(
+                """UPDATE goals SET plan_status = 'failed'
+                   WHERE plan_status = 'generating'
+                     AND (plan_requested_at IS NULL OR plan_requested_at < now() - make_interval(secs => $1))
+                   RETURNING id""",
+                stale_after_seconds
+            )
+        goal_ids = [record["id"] for record in records]
+        for goal_id in goal_ids:
+            await self.cache.invalidate(goal_id)
+        return goal_ids
+
+    # --- Tasks ---
+
+    async def get_task(self, task_id) -> Optional[Dict[str, Any]]:
+        async with self.db.acquire() as conn:
+            return _row(await conn.fetchrow("SELECT * FROM tasks WHERE id = $1", _as_uuid(task_id)))
+
+    async def get_task_with_owner(self, task_id) -> Optional[Dict[str, Any]]:
+        """A task plus the user_id of its goal (as goal_user_id)"""
+        async with self.db.acquire() as conn:
+            record = await conn.fetchrow(
+                """SELECT t.*, g.user_id AS goal_user_id
+                   FROM tasks t JOIN goals g ON g.id = t.goal_id
+                   WHERE t.id = $1""",
+                _as_uuid(task_id)
+            )
+            return _row(record)
+
+    async def list_tasks_for_goal(self, goal_id) -> List[Dict[str, Any]]:
+        async with self.db.acquire() as conn:
+            records = await conn.fetch(
+                "SELECT * FROM tasks WHERE goal_id = $1 ORDER BY week_number",
+                _as_uuid(goal_id)
+            )
+            return [dict(record) for record in records]
+
+    @staticmethod
+    def _task_arrays(tasks: List[Dict[str, Any]], columns: List[str]) -> List[list]:
+        # One array per column, so any number of rows is still a single statement
+        rows = [[_db_value(task[column]) for column in columns] for task in tasks]
+        arrays = [list(values) for values in zip(*rows)] if rows else [[] for _ in columns]
+        if columns[0] == "goal_id":
+            arrays[0] = [_as_uuid(goal_id) for goal_id in arrays[0]]
+        return arrays
+
+    async def _insert_tasks(self, conn, tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        unnest_args = ", ".join(f"${i}::{pg_type}" for i, pg_type in enumerate(TASK_INSERT_TYPES, start=1))
+        # The goals' total_tasks counters are bumped in the same statement
+        records = await conn.fetch(
+            f"""WITH new_tasks AS (
+                    INSERT INTO tasks ({', '.join(TASK_INSERT_COLUMNS)})
+                    SELECT * FROM unnest({unnest_args})
+                    RETURNING *
+                ), counted AS (
+                    UPDATE goals g SET total_tasks = g.total_tasks + c.added
+                    FROM (SELECT goal_id, count(*) AS added FROM new_tasks GROUP BY goal_id) c
+                    WHERE g.id = c.goal_id
+                )
+                SELECT * FROM new_tasks""",
+            *self._task_arrays(tasks, TASK_INSERT_COLUMNS)
+        )
+        return [dict(record) for record in records]
+
+    async def insert_tasks_bulk(self, tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insert many task rows with a single statement and return them"""
+        if not tasks:
+            return []
+        async with self.db.acquire() as conn:
+            created_tasks = await self._insert_tasks(conn, tasks)
+        for goal_id in {task["goal_id"] for task in created_tasks}:
+            await self.cache.invalidate(goal_id)
+        return created_tasks
+
+    async def create_goal_with_tasks(self, goal: Dict[str, Any], tasks: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Insert a goal and its tasks in one statement and return the goal with "tasks".
+
+        Both inserts are data-modifying CTEs of a single statement, so either everything
+        is stored or nothing is. The tasks' goal_id is taken from the inserted goal.
+        """
+        goal = {**goal, "total_tasks": len(tasks), "verified_tasks": 0}
+        goal_columns = list(goal)
+        goal_placeholders = ", ".join(f"${i}" for i in range(1, len(goal_columns) + 1))
+        task_columns = TASK_INSERT_COLUMNS[1:]
+        first_task_param = len(goal_columns) + 1
+        unnest_args = ", ".join(
+            f"${i}::{pg_type}" for i, pg_type in enumerate(TASK_INSERT_TYPES[1:], start=first_task_param)
+        )
+        async with self.db.acquire() as conn:
+            record = await conn.fetchrow(
+                f"""WITH new_goal AS (
+                        INSERT INTO goals ({', '.join(goal_columns)})
+                        VALUES ({goal_placeholders})
+                        RETURNING *
+                    ), new_tasks AS (
+                        INSERT INTO tasks ({', '.join(TASK_INSERT_COLUMNS)})
+                        SELECT new_goal.id, t.*
+                        FROM new_goal CROSS JOIN unnest({unnest_args}) AS t({', '.join(task_columns)})
+                        RETURNING *
+                    )
+                    SELECT new_goal.*,
+                           (SELECT COALESCE(json_agg(new_tasks ORDER BY new_tasks.week_number), '[]'::json)
+                            FROM new_tasks) AS created_tasks
+                    FROM new_goal""",
+                *[_db_value(goal[column]) for column in goal_columns],
+                *self._task_arrays(tasks, task_columns)
+            )
+        created_goal = dict(record)
+        created_goal["tasks"] = json.loads(created_goal.pop("created_tasks"))
+        return created_goal
+
+    async def replace_goal_plan(self, goal_id, tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Swap a goal's tasks for a new plan, reset its counters and mark the plan ready in one statement.
+
+        Every task of the new plan starts unverified, so the goal can't be complete yet; it
+        completes through mark_task_verified as they are approved.
+        """
+        goal_id = _as_uuid(goal_id)
+        task_columns = TASK_INSERT_COLUMNS[1:]
+        unnest_args = ", ".join(f"${i}::{pg_type}" for i, pg_type in enumerate(TASK_INSERT_TYPES[1:], start=3))
+        async with self.db.acquire() as conn:
+            # The DELETE only sees rows that existed before the statement, i.e. those left
+            # behind by an earlier, partial attempt, never the rows inserted alongside it
+            records = await conn.fetch(
+                f"""WITH cleared AS (
+                        DELETE FROM tasks WHERE goal_id = $1
+                    ), ready AS (
+                        UPDATE goals SET plan_status = $2, total_tasks = cardinality($3::int[]), verified_tasks = 0
+                        WHERE id = $1
+                    )
+                    INSERT INTO tasks ({', '.join(TASK_INSERT_COLUMNS)})
+                    SELECT $1, t.* FROM unnest({unnest_args}) AS t({', '.join(task_columns)})
+                    RETURNING *""",
+                goal_id, PlanStatusEnum.READY.value, *self._task_arrays(tasks, task_columns)
+            )
+        await self.cache.invalidate(goal_id)
+        return [dict(record) for record in records]
+
+    async def mark_task_verified(self, task_id) -> Optional[Dict[str, Any]]:
+        """Flip a task to verified and complete its goal once every task is verified.
+
+        Only an 'incomplete' goal whose plan is ready is completed: a late approval never
+        overwrites a settlement status written by the settlement cron, and an approval while a
+        streamed plan is still arriving week by week (total_tasks still growing) can't complete
+        it early; set_plan_status re-checks completion once the plan is ready.
+
+        A single statement: the task update only matches unverified tasks, and the goal's
+        verified_tasks counter and status are updated from that under the goal's row lock,
+        so concurrent approvals can neither double count nor miss the completion.
+        Returns the goal's counters and status, or None if the task was already verified.
+        """
+        async with self.db.acquire() as conn:
+            record = await conn.fetchrow(
+                """WITH flipped AS (
+                       UPDATE tasks SET verified = true
+                       WHERE id = $1 AND NOT verified
+                       RETURNING goal_id
+                   )
+                   UPDATE goals g
+                   SET verified_tasks = g.verified_tasks + 1,
+                       status = CASE
+                           WHEN g.status = $3::goal_status AND g.plan_status = $4 AND g.verified_tasks + 1 >= g.total_tasks
+                               THEN $2::goal_status
+                           ELSE g.status
+                       END
+                   FROM flipped
+                   WHERE g.id = flipped.goal_id
+                   RETURNING g.id, g.status, g.total_tasks, g.verified_tasks""",
+                _as_uuid(task_id), GoalStatusEnum.COMPLETED.value, GoalStatusEnum.INCOMPLETE.value,
+                PlanStatusEnum.READY.value
+            )
+        if record is not None:
+            # The task list, the goal's counters and possibly its status changed
+            await self.cache.invalidate(record["id"])
+        return _row(record)
+
+    # --- Submissions ---
+
+    async def record_submission(self, submission: Dict[str, Any]) -> Dict[str, Any]:
+        async with self.db.acquire() as conn:
+            return await self._insert(conn, "submissions", submission)
+
+    async def update_submission(self, submission_id, values: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        async with self.db.acquire() as conn:
+            return await self._update(conn, "submissions", submission_id, values)
+
+    async def get_submission(self, submission_id) -> Optional[Dict[str, Any]]:
+        async with self.db.acquire() as conn:
+            return _row(await conn.fetchrow("SELECT * FROM submissions WHERE id = $1", _as_uuid(submission_id)))
+
+    async def get_submission_with_owner(self, submission_id) -> Optional[Dict[str, Any]]:
+        """A submission plus the user_id of its task's goal (as goal_user_id)"""
+        async with self.db.acquire() as conn:
+            record = await conn.fetchrow(
+                """SELECT s.*, g.user_id AS goal_user_id
+                   FROM submissions s
+                   JOIN tasks t ON t.id = s.task_id
+                   JOIN goals g ON g.id = t.goal_id
+                   WHERE s.id = $1""",
+                _as_uuid(submission_id)
+            )
+            return _row(record)
+
+    async def fail_stale_verifications(self, stale_after_seconds: float, comments: str, submission_id=None) -> List[UUID]:
+        """Mark pending/running submissions older than stale_after_seconds (optionally just one) as
+        failed with the given comments; returns their ids
+        """
+        async with self.db.acquire() as conn:
+            records = await conn.fetch(
+                """UPDATE submissions SET verification_status = 'failed', verification_comments = $2
+                   WHERE verification_status IN ('pending', 'running')
+                     AND timestamp < now() - make_interval(secs => $1)
+                     AND ($3::uuid IS NULL OR id = $3)
+                   RETURNING id""",
+                stale_after_seconds, comments, _as_uuid(submission_id) if submission_id is not None else None
+            )
+            return [record["id"] for record in records]
+
+
+# Global repository on the process-wide pool
+repository = Repository()
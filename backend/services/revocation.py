@@ -0,0 +1,169 @@
+import asyncio
+import hashlib
+import math
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional, Set
+
+from services.database import Database, database
+from services.lru_cache import TTLLRUCache
+
+# How often each worker reloads its Bloom filter from revoked_tokens, i.e. how long a
+# logout on one worker can take to reach the others
+REVOCATION_SYNC_SECONDS = float(os.getenv("REVOCATION_SYNC_SECONDS", "30"))
+REVOCATION_BLOOM_MIN_CAPACITY = int(os.getenv("REVOCATION_BLOOM_MIN_CAPACITY", "10000"))
+REVOCATION_BLOOM_ERROR_RATE = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", "0.001"))
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (no false negatives, tunable false positives)"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(capacity, 1)
+        self.size_bits = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size_bits / self.capacity * math.log(2)))
+        self._bits = bytearray((self.size_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size_bits for i in range(self.hash_count))
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    @classmethod
+    def build(cls, items: Iterable[str], expected: int, error_rate: float = REVOCATION_BLOOM_ERROR_RATE) -> "BloomFilter":
+        bloom = cls(expected, error_rate)
+        for item in items:
+            bloom.add(item)
+        return bloom
+
+
+class TokenRevocationList:
+    """Denylist of revoked token ids stored in revoked_tokens, fronted by a per-worker Bloom filter.
+
+    The common case (token not revoked) is a filter miss answered in memory; only filter
+    hits are confirmed against Postgres. Each worker rebuilds its filter from the table
+    every REVOCATION_SYNC_SECONDS, and tokens it revokes itself are added immediately.
+    """
+
+    def __init__(self, db: Database = database, sync_interval: float = REVOCATION_SYNC_SECONDS):
+        self.db = db
+        self.sync_interval = sync_interval
+        self.filter = BloomFilter(REVOCATION_BLOOM_MIN_CAPACITY, REVOCATION_BLOOM_ERROR_RATE)
+        # Confirmed answers for filter hits, so a false positive costs one query per sync interval
+        self._confirmed = TTLLRUCache(REVOCATION_BLOOM_MIN_CAPACITY, sync_interval)
+        # Revoked here since the last sync began; re-added to a rebuilt filter in case the
+        # sync's read raced their insert
+        self._pending: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+        self.filter_misses = 0
+        self.store_lookups = 0
+        self.false_positives = 0
+        self.syncs = 0
+        self.sync_errors = 0
+
+    async def start(self):
+        if self.db.is_connected:
+            try:
+                await self.sync()
+            except Exception as e:
+                self.sync_errors += 1
+                print(f"Initial token revocation sync failed: {e}")
+        self._task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def revoke(self, jti: str, expires_at: datetime, user_id: Optional[str] = None):
+        """Record a revocation until expires_at (the token's own exp)"""
+        async with self.db.acquire() as conn:
+            await conn.execute(
+                """INSERT INTO revoked_tokens (jti, user_id, expires_at) VALUES ($1, $2, $3)
+                   ON CONFLICT (jti) DO NOTHING""",
+                jti, user_id, expires_at
+            )
+        self.filter.add(jti)
+        self._pending.add(jti)
+        self._confirmed.set(jti, True)
+
+    async def is_revoked(self, jti: str) -> bool:
+        if jti not in self.filter:
+            self.filter_misses += 1
+            return False
+
+        confirmed = self._confirmed.get(jti)
+        if confirmed is not None:
+            return confirmed
+        self.store_lookups += 1
+        try:
+            async with self.db.acquire() as conn:
+                revoked = await conn.fetchval(
+                    "SELECT EXISTS (SELECT 1 FROM revoked_tokens WHERE jti = $1 AND expires_at > now())",
+                    jti
+                )
+        except Exception as e:
+            # Fail closed: a filter hit we can't confirm is treated as revoked
+            print(f"Token revocation lookup failed: {e}")
+            return True
+        if not revoked:
+            self.false_positives += 1
+        self._confirmed.set(jti, revoked)
+        return revoked
+
+    async def sync(self):
+        """Purge expired revocations and rebuild this worker's filter from the rest"""
+        pending = set(self._pending)
+        async with self.db.acquire() as conn:
+            await conn.execute("DELETE FROM revoked_tokens WHERE expires_at <= now()")
+            rows = await conn.fetch("SELECT jti FROM revoked_tokens")
+        # Room for twice the current list, so revocations until the next sync keep the error rate
+        expected = max(REVOCATION_BLOOM_MIN_CAPACITY, 2 * len(rows))
+        bloom = BloomFilter.build((row["jti"] for row in rows), expected)
+        for jti in self._pending:
+            bloom.add(jti)
+        self._pending -= pending
+        self.filter = bloom
+        self.syncs += 1
+
+    async def _sync_loop(self):
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            if not self.db.is_connected:
+                continue
+            try:
+                await self.sync()
+            except Exception as e:
+                self.sync_errors += 1
+                print(f"Token revocation sync failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "revoked_in_filter": self.filter.count,
+            "filter_capacity": self.filter.capacity,
+            "filter_misses": self.filter_misses,
+            "store_lookups": self.store_lookups,
+            "false_positives": self.false_positives,
+            "syncs": self.syncs,
+            "sync_errors": self.sync_errors,
+        }
+
+
+def token_expiry(exp: float) -> datetime:
+    return datetime.fromtimestamp(exp, tz=timezone.utc)
+
+
+# Global revocation list, synced by the application lifespan
+token_revocations = TokenRevocationList()
@@ -0,0 +1,37 @@
+from typing import Any, Dict, Iterable, Mapping
+
+import orjson
+from fastapi.responses import ORJSONResponse
+
+from models import GoalStatusResponse, GoalSummary, Task
+
+# Response fields, read once from the models so payloads keep the documented shape.
+# Rows from our own queries are trusted: they are projected onto these fields and handed
+# to orjson (which encodes UUID, date and datetime natively) without pydantic validation.
+TASK_FIELDS = tuple(Task.model_fields)
+GOAL_FIELDS = tuple(field for field in GoalStatusResponse.model_fields if field != "tasks")
+GOAL_SUMMARY_FIELDS = tuple(GoalSummary.model_fields)
+
+
+def dumps(payload: Any) -> bytes:
+    return orjson.dumps(payload)
+
+
+def task_payload(row: Mapping[str, Any]) -> Dict[str, Any]:
+    return {field: row[field] for field in TASK_FIELDS}
+
+
+def goal_status_payload(goal_row: Mapping[str, Any], task_rows: Iterable[Mapping[str, Any]]) -> Dict[str, Any]:
+    """A GoalStatusResponse-shaped dict from a goals row and its task rows"""
+    payload = {field: goal_row[field] for field in GOAL_FIELDS}
+    payload["tasks"] = [task_payload(row) for row in task_rows]
+    return payload
+
+
+def goal_summary_payload(row: Mapping[str, Any]) -> Dict[str, Any]:
+    return {field: row[field] for field in GOAL_SUMMARY_FIELDS}
+
+
+def trusted_response(payload: Any, status_code: int = 200) -> ORJSONResponse:
+    """Return a payload built from trusted rows as-is, bypassing response_model re-validation"""
+    return ORJSONResponse(payload, status_code=status_code)
@@ -0,0 +1,95 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional
+
+from xrpl.core import keypairs
+
+from services.lru_cache import TTLLRUCache
+
+# Processes verifying wallet signatures (ed25519/secp256k1 verification is pure Python and
+# holds the GIL); 0 verifies in a thread instead
+SIGNATURE_VERIFY_WORKERS = int(os.getenv("SIGNATURE_VERIFY_WORKERS", "2"))
+PUBLIC_KEY_ADDRESS_CACHE_MAX_ENTRIES = int(os.getenv("PUBLIC_KEY_ADDRESS_CACHE_MAX_ENTRIES", "10000"))
+# A public key's classic address never changes; the TTL only bounds how long an idle entry lingers
+_ADDRESS_CACHE_TTL_SECONDS = 24 * 60 * 60
+
+
+def is_valid_signature(message: bytes, signature_hex: str, public_key: str) -> bool:
+    """Check one XRPL message signature; runs inside the process pool"""
+    try:
+        return keypairs.is_valid_message(message, bytes.fromhex(signature_hex), public_key)
+    except Exception:
+        # Malformed signatures or keys that aren't curve points
+        return False
+
+
+class SignatureVerifier:
+    """Verifies that a message was signed by the key behind a classic address.
+
+    The public key must derive to the claimed address (derivations are cached per key),
+    and the signature over the message bytes must verify against it. Clients sign the
+    hex of the message (keypairs.sign(str_to_hex(message), private_key)).
+    """
+
+    def __init__(self, workers: int = SIGNATURE_VERIFY_WORKERS):
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.addresses = TTLLRUCache(PUBLIC_KEY_ADDRESS_CACHE_MAX_ENTRIES, _ADDRESS_CACHE_TTL_SECONDS)
+        self.verified = 0
+        self.rejected = 0
+        self.address_mismatches = 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    def derive_address(self, public_key: str) -> Optional[str]:
+        """Classic address for a hex public key, or None if the key is malformed"""
+        public_key = public_key.upper()
+        address = self.addresses.get(public_key)
+        if address is None:
+            try:
+                bytes.fromhex(public_key)
+                if len(public_key) != 66:
+                    return None
+                address = keypairs.derive_classic_address(public_key)
+            except ValueError:
+                return None
+            self.addresses.set(public_key, address)
+        return address
+
+    async def verify(self, wallet_address: str, message: str, signature_hex: str, public_key: str) -> bool:
+        if self.derive_address(public_key) != wallet_address:
+            self.address_mismatches += 1
+            return False
+
+        if self.workers > 0:
+            loop = asyncio.get_running_loop()
+            valid = await loop.run_in_executor(self._get_pool(), is_valid_signature, message.encode(), signature_hex, public_key.upper())
+        else:
+            valid = await asyncio.to_thread(is_valid_signature, message.encode(), signature_hex, public_key.upper())
+        if valid:
+            self.verified += 1
+        else:
+            self.rejected += 1
+        return valid
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "verified": self.verified,
+            "rejected": self.rejected,
+            "address_mismatches": self.address_mismatches,
+            "address_cache": self.addresses.stats(),
+        }
+
+
+# Global signature verifier; its pool is shut down by the application lifespan
+signature_verifier = SignatureVerifier()
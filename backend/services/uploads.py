@@ -0,0 +1,206 @@
+import hashlib
+import io
+import os
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException, UploadFile, status
+from fastapi.responses import JSONResponse
+
+# Upload limits for submission images
+UPLOAD_MAX_FILE_BYTES = int(os.getenv("UPLOAD_MAX_FILE_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_MAX_REQUEST_BYTES = int(os.getenv("UPLOAD_MAX_REQUEST_BYTES", str(25 * 1024 * 1024)))
+UPLOAD_MAX_USER_INFLIGHT_BYTES = int(os.getenv("UPLOAD_MAX_USER_INFLIGHT_BYTES", str(40 * 1024 * 1024)))
+UPLOAD_MAX_FILES = int(os.getenv("UPLOAD_MAX_FILES", "5"))
+UPLOAD_CHUNK_BYTES = 64 * 1024
+
+# Formats the verifier can decode, identified by their leading bytes
+IMAGE_SIGNATURES = [
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+]
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """Identify an image from its magic bytes, ignoring the client-supplied content type"""
+    for signature, mime_type in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return mime_type
+    if len(head) >= 12 and head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+class IngestedImage:
+    """An uploaded image, still in the spooled temp file the multipart parser wrote it to,
+    shared by storage and the AI verifier"""
+
+    def __init__(self, filename: str, mime_type: str, size: int, sha256: str, spool):
+        self.filename = filename
+        self.mime_type = mime_type
+        self.size = size
+        self.sha256 = sha256
+        self._spool = spool
+
+    def read_bytes(self) -> bytes:
+        self._spool.seek(0)
+        return self._spool.read()
+
+    def close(self):
+        self._spool.close()
+
+
+class UploadBudget:
+    """Tracks bytes currently held in ingested uploads per user"""
+
+    def __init__(self, max_user_bytes: int = UPLOAD_MAX_USER_INFLIGHT_BYTES):
+        self.max_user_bytes = max_user_bytes
+        self._in_flight: Dict[str, int] = defaultdict(int)
+
+    def reserve(self, user_key: str, nbytes: int):
+        if self._in_flight[user_key] + nbytes > self.max_user_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too much upload data in flight for this user. Wait for pending submissions to finish."
+            )
+        self._in_flight[user_key] += nbytes
+
+    def release(self, user_key: str, nbytes: int):
+        remaining = self._in_flight[user_key] - nbytes
+        if remaining > 0:
+            self._in_flight[user_key] = remaining
+        else:
+            self._in_flight.pop(user_key, None)
+
+
+upload_budget = UploadBudget()
+
+
+class IngestedUpload:
+    """The images of one request plus the user budget they hold until released"""
+
+    def __init__(self, user_key: str):
+        self.user_key = user_key
+        self.images: List[IngestedImage] = []
+        self.total_bytes = 0
+        self._released = False
+
+    def release(self):
+        if self._released:
+            return
+        self._released = True
+        for image in self.images:
+            image.close()
+        upload_budget.release(self.user_key, self.total_bytes)
+
+
+async def ingest_images(files: List[UploadFile], user_key: str) -> IngestedUpload:
+    """Check uploads in place, enforcing size, count and type limits, and take over their spools.
+
+    Each file is read once in chunks (to sniff, size and hash it) from the spooled temp
+    file Starlette already parsed it into; nothing is copied. The caller owns the result
+    and must call release() once verification is done.
+    """
+    files = [f for f in files if f is not None]
+    if len(files) > UPLOAD_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {UPLOAD_MAX_FILES} images can be submitted at once.")
+
+    upload = IngestedUpload(user_key)
+    try:
+        for upload_file in files:
+            if upload_file.size is not None and upload_file.size > UPLOAD_MAX_FILE_BYTES:
+                raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"{upload_file.filename} exceeds the {UPLOAD_MAX_FILE_BYTES} byte per-image limit.")
+            digest = hashlib.sha256()
+            size = 0
+            mime_type = None
+            await upload_file.seek(0)
+            while chunk := await upload_file.read(UPLOAD_CHUNK_BYTES):
+                if mime_type is None:
+                    mime_type = sniff_image_type(chunk)
+                    if mime_type is None:
+                        raise HTTPException(status_code=400, detail=f"Invalid file type: {upload_file.filename}. Please upload JPEG, PNG, GIF or WebP images.")
+                size += len(chunk)
+                if size > UPLOAD_MAX_FILE_BYTES:
+                    raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"{upload_file.filename} exceeds the {UPLOAD_MAX_FILE_BYTES} byte per-image limit.")
+                if upload.total_bytes + len(chunk) > UPLOAD_MAX_REQUEST_BYTES:
+                    raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"Images exceed the {UPLOAD_MAX_REQUEST_BYTES} byte per-request limit.")
+                upload_budget.reserve(user_key, len(chunk))
+                upload.total_bytes += len(chunk)
+                digest.update(chunk)
+
+            if size == 0:
+                raise HTTPException(status_code=400, detail=f"{upload_file.filename} is empty.")
+            await upload_file.seek(0)
+            # Take ownership of the spool: FastAPI closes the form's files when the handler
+            # returns, which would pull it out from under a queued (async mode) verification
+            spool, upload_file.file = upload_file.file, io.BytesIO()
+            upload.images.append(IngestedImage(upload_file.filename, mime_type, size, digest.hexdigest(), spool))
+    except BaseException:
+        # Files not taken over yet are still closed by FastAPI with the form
+        upload.release()
+        raise
+    return upload
+
+
+class RequestSizeLimitMiddleware:
+    """Rejects oversized request bodies on the given paths before they are buffered.
+
+    Checks Content-Length up front and counts streamed bytes for chunked bodies.
+    """
+
+    def __init__(self, app, paths: List[str], max_bytes: int):
+        self.app = app
+        self.paths = set(paths)
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        too_large = JSONResponse(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            content={"detail": f"Request body exceeds {self.max_bytes} bytes."}
+        )
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_bytes:
+            await too_large(scope, receive, send)
+            return
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    exceeded = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            if exceeded:
+                # Whatever error the app produced from the aborted body parse, answer 413 instead
+                if message["type"] == "http.response.start" and not response_started:
+                    response_started = True
+                    await too_large(scope, receive, send)
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except _BodyTooLarge:
+            if not response_started:
+                await too_large(scope, receive, send)
+
+
+class _BodyTooLarge(Exception):
+    pass
@@ -0,0 +1,119 @@
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from models import SubmissionStatusEnum
+
+# Worker pool sizing is independent of the number of API workers/connections
+VERIFICATION_WORKERS = int(os.getenv("VERIFICATION_WORKERS", "4"))
+VERIFICATION_QUEUE_MAXSIZE = int(os.getenv("VERIFICATION_QUEUE_MAXSIZE", "100"))
+JOB_RETENTION_SECONDS = 300
+# Jobs live in process memory, so a restart loses them; a submission still pending/running
+# after this long is treated as lost and marked failed
+VERIFICATION_JOB_TIMEOUT_SECONDS = float(os.getenv("VERIFICATION_JOB_TIMEOUT_SECONDS", "900"))
+
+TERMINAL_STATUSES = {SubmissionStatusEnum.COMPLETED, SubmissionStatusEnum.FAILED}
+
+
+class QueueFullError(Exception):
+    """Raised when the verification backlog is at capacity"""
+
+
+class VerificationJob:
+    """In-memory state for one queued submission verification"""
+
+    def __init__(self, job_id: str, handler: Callable[[], Awaitable[Dict[str, Any]]], owner_id: Optional[str] = None):
+        self.job_id = job_id
+        self.handler = handler
+        self.owner_id = owner_id
+        self.status = SubmissionStatusEnum.PENDING
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.updated_at = time.monotonic()
+        self._changed = asyncio.Event()
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    def update(self, status: SubmissionStatusEnum, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+        self.status = status
+        self.result = result
+        self.error = error
+        self.updated_at = time.monotonic()
+        # Wake every waiter, then arm a fresh event for the next change
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait_for_change(self, timeout: float) -> bool:
+        """Wait until the job changes state; returns False on timeout"""
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+class VerificationQueue:
+    """Bounded queue drained by a fixed pool of verification workers"""
+
+    def __init__(self, workers: int = VERIFICATION_WORKERS, maxsize: int = VERIFICATION_QUEUE_MAXSIZE):
+        self.workers = workers
+        self.maxsize = maxsize
+        self.jobs: Dict[str, VerificationJob] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._tasks = [asyncio.create_task(self._worker(n)) for n in range(self.workers)]
+        print(f"Verification queue started with {self.workers} workers")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        print("Verification queue stopped")
+
+    def enqueue(self, job_id: str, handler: Callable[[], Awaitable[Dict[str, Any]]], owner_id: Optional[str] = None) -> VerificationJob:
+        """Queue a verification handler for owner_id's submission; raises QueueFullError when at capacity"""
+        if self._queue is None:
+            raise RuntimeError("Verification queue has not been started")
+        self._prune()
+        job = VerificationJob(job_id, handler, owner_id)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFullError("Verification queue is full")
+        self.jobs[job_id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[VerificationJob]:
+        return self.jobs.get(job_id)
+
+    def _prune(self):
+        cutoff = time.monotonic() - JOB_RETENTION_SECONDS
+        for job_id in [j.job_id for j in self.jobs.values() if j.is_finished and j.updated_at < cutoff]:
+            del self.jobs[job_id]
+
+    async def _worker(self, worker_number: int):
+        while True:
+            job = await self._queue.get()
+            try:
+                job.update(SubmissionStatusEnum.RUNNING)
+                result = await job.handler()
+                job.update(SubmissionStatusEnum.COMPLETED, result=result)
+            except asyncio.CancelledError:
+                job.update(SubmissionStatusEnum.FAILED, error="Verification worker shut down")
+                raise
+            except Exception as e:
+                print(f"Verification worker {worker_number} failed job {job.job_id}: {e}")
+                job.update(SubmissionStatusEnum.FAILED, error=str(e))
+            finally:
+                self._queue.task_done()
+
+
+# Global verification queue instance
+verification_queue = VerificationQueue()
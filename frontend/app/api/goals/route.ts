@@ -0,0 +1,38 @@
+import { NextRequest, NextResponse } from 'next/server'
+
+export async function GET(request: NextRequest) {
+  try {
+    // Get Authorization header from the request
+    const authHeader = request.headers.get('authorization')
+    
+    // Proxy the request to the backend, keeping cursor/limit/status query parameters
+    const backendUrl = process.env.BACKEND_URL || 'http://localhost:8000'
+    const headers: Record<string, string> = {
+      'Content-Type': 'application/json',
+    }
+    
+    // Forward Authorization header if present
+    if (authHeader) {
+      headers['Authorization'] = authHeader
+    }
+    
+    const response = await fetch(`${backendUrl}/goals${request.nextUrl.search}`, {
+      method: 'GET',
+      headers,
+    })
+
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({ detail: 'Unknown error' }))
+      return NextResponse.json(errorData, { status: response.status })
+    }
+
+    const data = await response.json()
+    return NextResponse.json(data)
+  } catch (error) {
+    console.error('API route error:', error)
+    return NextResponse.json(
+      { detail: 'Internal server error' },
+      { status: 500 }
+    )
+  }
+}
@@ -20,19 +20,36 @@ export async function GET(
     if (authHeader) {
       headers['Authorization'] = authHeader
     }
+
+    // Forward the browser's cached ETag so unchanged polls come back as 304
+    const ifNoneMatch = request.headers.get('if-none-match')
+    if (ifNoneMatch) {
+      headers['If-None-Match'] = ifNoneMatch
+    }
     
     const response = await fetch(`${backendUrl}/goals/status/${goalId}`, {
       method: 'GET',
       headers,
     })
 
+    const cacheHeaders: Record<string, string> = {}
+    const etag = response.headers.get('etag')
+    if (etag) {
+      cacheHeaders['ETag'] = etag
+      cacheHeaders['Cache-Control'] = 'private, no-cache'
+    }
+
+    if (response.status === 304) {
+      return new NextResponse(null, { status: 304, headers: cacheHeaders })
+    }
+
     if (!response.ok) {
       const errorData = await response.json().catch(() => ({ detail: 'Unknown error' }))
       return NextResponse.json(errorData, { status: response.status })
     }
 
     const data = await response.json()
-    return NextResponse.json(data)
+    return NextResponse.json(data, { headers: cacheHeaders })
   } catch (error) {
     console.error('API route error:', error)
     return NextResponse.json(
@@ -150,7 +150,7 @@ export default function TaskSubmissionModal({
       const result = await response.json()
       console.log('Submission successful:', result)
       
-      const isVerified = result.verification_result === 'true'
+      const isVerified = result.verification_result === true
       
       if (isVerified) {
         // Success - show encouraging message and toast
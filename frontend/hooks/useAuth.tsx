@@ -335,6 +335,15 @@ export function AuthProvider({ children }: AuthProviderProps) {
   }
 
   const logout = () => {
+    // Revoke the token server-side (best effort; it is discarded locally either way)
+    const token = localStorage.getItem('auth_token')
+    if (token) {
+      fetch(`${API_BASE_URL}/auth/logout`, {
+        method: 'POST',
+        headers: { 'Authorization': `Bearer ${token}` },
+      }).catch((error) => console.error('Logout request failed:', error))
+    }
+
     // Clear backend auth data
     localStorage.removeItem('auth_token')
     localStorage.removeItem('user_data')
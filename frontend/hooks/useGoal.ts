@@ -34,6 +34,7 @@ export interface GoalData {
   xrp_amount: number
   start_date: string
   status: 'incomplete' | 'completed'
+  plan_status: 'generating' | 'ready' | 'failed'
   tasks: Array<{
     id: string
     goal_id: string
@@ -41,10 +42,13 @@ export interface GoalData {
     title: string
     verification_method: string
     expected_data_type: 'image' | 'text'
-    verified: 'true' | 'false'
+    verified: boolean
   }>
 }
 
+// How often to poll while the backend is still generating the task plan
+const PLAN_POLL_INTERVAL_MS = 2000
+
 // Hook to fetch goal data by ID
 export function useGoal(goalId: string | null) {
   const { data, error, isLoading, mutate } = useSWR<GoalData>(
@@ -54,6 +58,8 @@ export function useGoal(goalId: string | null) {
       revalidateOnFocus: false,
       revalidateOnReconnect: true,
       errorRetryCount: 3,
+      // Keep polling until task generation has finished
+      refreshInterval: (latest) => latest?.plan_status === 'generating' ? PLAN_POLL_INTERVAL_MS : 0,
     }
   )
 
@@ -62,6 +68,8 @@ export function useGoal(goalId: string | null) {
     isLoading,
     isError: !!error,
     error,
+    isPlanGenerating: data?.plan_status === 'generating',
+    isPlanFailed: data?.plan_status === 'failed',
     mutate, // For manual revalidation
   }
 }
@@ -86,7 +94,7 @@ export function useCurrentGoal() {
     }
   }, [])
 
-  const { goal, isLoading: isGoalLoading, isError, error, mutate } = useGoal(goalId)
+  const { goal, isLoading: isGoalLoading, isError, error, isPlanGenerating, isPlanFailed, mutate } = useGoal(goalId)
 
   // Show loading until we know if there's a goal ID or not
   const isLoading = !isClient || isGoalLoading
@@ -97,6 +105,8 @@ export function useCurrentGoal() {
     isLoading,
     isError,
     error,
+    isPlanGenerating,
+    isPlanFailed,
     mutate,
     hasGoal: !!goalId,
   }
@@ -97,7 +97,7 @@ export function useProgress(goal: GoalData | undefined) {
   const getCompletionStats = () => {
     if (!goal) return { completed: 0, total: 0, percentage: 0 }
 
-    const completed = goal.tasks.filter(task => task.verified === 'true').length
+    const completed = goal.tasks.filter(task => task.verified).length
     const total = goal.tasks.length
     const percentage = total > 0 ? Math.round((completed / total) * 100) : 0
 
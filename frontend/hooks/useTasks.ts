@@ -9,8 +9,8 @@ const convertBackendTask = (backendTask: GoalData['tasks'][0], _index: number):
     title: backendTask.title,
     description: backendTask.verification_method || 'Complete this task',
     priority: 'medium' as const, // Default priority since backend doesn't have this
-    completed: backendTask.verified === 'true',
-    completionStatus: backendTask.verified === 'true' ? 'success' : undefined,
+    completed: backendTask.verified,
+    completionStatus: backendTask.verified ? 'success' : undefined,
     avatar: `https://api.dicebear.com/7.x/initials/svg?seed=${backendTask.title}&backgroundColor=6366f1`, // Generate avatar based on task title
     // Backend fields
     verification_method: backendTask.verification_method,
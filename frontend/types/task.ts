@@ -13,5 +13,5 @@ export interface Task {
   // Backend fields
   verification_method?: string
   expected_data_type?: 'image' | 'text'
-  verified?: 'true' | 'false'
+  verified?: boolean
 }